@@ -9,12 +9,16 @@ import streamlit as st
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
-from src.ft_adapter import get_key_metrics
+from src.ft_adapter import get_key_metrics, source_identity
+from src.result_cache import ResultCache
+from src.statement_cache import force_refresh, force_refresh_active
 from src.schema import load_schema
-from src.plots import plot_by_selection, PlotError
+from src.plots import render_by_selection, render_dashboard, PlotError
 from src.ai_agent import (
     analyze_indicator_timeseries,
     analyze_group_timeseries,
+    analyze_all_groups,
+    llm_cache_stats,
     AIConfigError,
 )
 
@@ -28,6 +32,68 @@ st.write("目标：单公司多期趋势 + 指标/指标组可视化 + DeepSeek
 
 schema = load_schema("config/indicators.yaml")
 
+
+# --------------------------
+# 进程级结果缓存：所有会话共享（同一 ticker 只拉取/计算一次）
+# --------------------------
+@st.cache_resource
+def metrics_cache() -> ResultCache:
+    return ResultCache.from_env()
+
+
+def load_metrics(ticker: str, refresh: bool = False):
+    # 外层已处于 force_refresh() 时同样视为强制刷新
+    refresh = refresh or force_refresh_active()
+    # 数据源以 adapter 的解析结果为准（provider 模式 + 实际数据源 + FMP key 指纹）
+    key = (
+        ticker,
+        *source_identity(schema=schema),
+        "timeseries",
+        "all",
+        schema.version,
+    )
+
+    def compute():
+        if refresh:
+            # 强制刷新：跳过磁盘上的报表缓存，直接请求数据源
+            with force_refresh():
+                return get_key_metrics(ticker, output="timeseries", periods="all", inspect=False)
+        return get_key_metrics(ticker, output="timeseries", periods="all", inspect=False)
+
+    return metrics_cache().get_or_compute(key, compute, force=refresh)
+
+
+# --------------------------
+# AI 流式输出
+# --------------------------
+def stream_answer(make_chunks) -> bool:
+    """
+    流式展示 AI 回答，成功时返回 True。标题和输出放在同一个占位容器里，
+    出错时整体清空：不留孤立标题和半截回答，也不再回显上一轮的答案。
+    """
+    box = st.empty()
+
+    def fail(message: str) -> bool:
+        box.empty()
+        st.session_state.ai_last_answer = ""
+        st.error(message)
+        return False
+
+    try:
+        chunks = make_chunks()
+        with box.container():
+            st.markdown("---")
+            st.markdown("**AI 分析结果：**")
+            answer = st.write_stream(chunks)
+    except AIConfigError as e:
+        return fail(f"AI 配置问题：{e}")
+    except ValueError as e:
+        return fail(f"数据不足：{e}")
+    except Exception as e:
+        return fail(f"AI 分析失败：{e}")
+    st.session_state.ai_last_answer = answer
+    return True
+
 # --------------------------
 # 初始化 session_state
 # --------------------------
@@ -56,11 +122,13 @@ if "ai_last_answer" not in st.session_state:
 # --------------------------
 ticker = st.text_input("Ticker（股票代码）", value="AAPL").strip().upper()
 
+VIEW_MODES = ["Group (recommended)", "Single indicator", "Dashboard (all groups)"]
+
 view_mode = st.radio(
     "View Mode",
-    ["Group (recommended)", "Single indicator"],
+    VIEW_MODES,
     horizontal=True,
-    index=0 if st.session_state.view_mode == "Group (recommended)" else 1,
+    index=VIEW_MODES.index(st.session_state.view_mode),
     key="view_mode",
 )
 
@@ -68,14 +136,11 @@ view_mode = st.radio(
 # --------------------------
 # Run 按钮：只负责“重新拉数据”
 # --------------------------
+refresh = st.checkbox("Force refresh（忽略缓存，重新拉取数据）", value=False)
+
 if st.button("Run"):
     try:
-        df = get_key_metrics(
-            ticker,
-            output="timeseries",
-            periods="all",
-            inspect=False,
-        )
+        df = load_metrics(ticker, refresh=refresh)
         if df is None or df.empty:
             st.warning("No data returned. Try another ticker (e.g. MSFT / NVDA).")
             st.session_state.data_loaded = False
@@ -119,13 +184,19 @@ if st.session_state.data_loaded and st.session_state.df is not None:
             )
             current_group_key = group_key
 
-            fig = plot_by_selection(
+            # 渲染结果按数据指纹缓存，未变化的图表在 rerun 时不会重新绘制
+            png = render_by_selection(
                 df,
                 schema,
                 group_key=group_key,
                 title_prefix=f"{ticker} - ",
             )
-            st.pyplot(fig)
+            st.image(png, width="stretch")
+
+        elif st.session_state.view_mode == "Dashboard (all groups)":
+            # 所有指标组画在同一张图里（共享 x 轴），一次渲染、整体缓存
+            png = render_dashboard(df, schema, title_prefix=f"{ticker} - ")
+            st.image(png, width="stretch")
 
         else:  # Single indicator
             indicator_key = st.selectbox(
@@ -137,13 +208,13 @@ if st.session_state.data_loaded and st.session_state.df is not None:
             )
             current_indicator_key = indicator_key
 
-            fig = plot_by_selection(
+            png = render_by_selection(
                 df,
                 schema,
                 indicator_key=indicator_key,
                 title_prefix=f"{ticker} - ",
             )
-            st.pyplot(fig)
+            st.image(png, width="stretch")
 
     except PlotError as e:
         st.error(f"Plot error: {e}")
@@ -168,48 +239,62 @@ if st.session_state.data_loaded and st.session_state.df is not None:
         height=100,
     )
 
+    # 流式输出时答案已在本轮渲染过，底部不再重复展示
+    just_streamed = False
+
     if st.session_state.view_mode == "Single indicator" and current_indicator_key is not None:
         if st.button("让 AI 解读这个指标"):
-            try:
-                with st.spinner("AI 正在分析单个指标，请稍等…"):
-                    answer = analyze_indicator_timeseries(
-                        ticker=ticker,
-                        df=df,
-                        indicator_key=current_indicator_key,
-                        schema=schema,
-                        user_prompt=user_prompt,
-                    )
-                st.session_state.ai_last_answer = answer
-            except AIConfigError as e:
-                st.error(f"AI 配置问题：{e}")
-            except ValueError as e:
-                st.error(f"数据不足：{e}")
-            except Exception as e:
-                st.error(f"AI 分析失败：{e}")
+            just_streamed = stream_answer(
+                lambda: analyze_indicator_timeseries(
+                    ticker=ticker,
+                    df=df,
+                    indicator_key=current_indicator_key,
+                    schema=schema,
+                    user_prompt=user_prompt,
+                    stream=True,
+                )
+            )
 
     elif st.session_state.view_mode == "Group (recommended)" and current_group_key is not None:
         if st.button("让 AI 解读这个指标组"):
+            just_streamed = stream_answer(
+                lambda: analyze_group_timeseries(
+                    ticker=ticker,
+                    df=df,
+                    group_key=current_group_key,
+                    schema=schema,
+                    user_prompt=user_prompt,
+                    stream=True,
+                )
+            )
+
+    # 所有指标组并发分析，汇总成一份报告（Group / Dashboard 模式）
+    if st.session_state.view_mode != "Single indicator":
+        if st.button("让 AI 解读全部指标组"):
             try:
-                with st.spinner("AI 正在分析指标组，请稍等…"):
-                    answer = analyze_group_timeseries(
+                with st.spinner(f"AI 正在并发分析 {len(schema.groups)} 个指标组，请稍等…"):
+                    report = analyze_all_groups(
                         ticker=ticker,
                         df=df,
-                        group_key=current_group_key,
                         schema=schema,
                         user_prompt=user_prompt,
                     )
-                st.session_state.ai_last_answer = answer
-            except AIConfigError as e:
-                st.error(f"AI 配置问题：{e}")
-            except ValueError as e:
-                st.error(f"数据不足：{e}")
+                st.session_state.ai_last_answer = report.to_markdown()
+                if report.failed:
+                    st.warning(f"{len(report.failed)} 个指标组分析失败，详见报告。")
+                st.caption(f"{len(report.succeeded)}/{len(report.analyses)} groups in {report.elapsed_s:.1f}s")
             except Exception as e:
                 st.error(f"AI 分析失败：{e}")
 
     # 展示上一轮 AI 输出
     if st.session_state.ai_last_answer:
-        st.markdown("---")
-        st.markdown("**AI 分析结果：**")
-        st.markdown(st.session_state.ai_last_answer)
+        if not just_streamed:
+            st.markdown("---")
+            st.markdown("**AI 分析结果：**")
+            st.markdown(st.session_state.ai_last_answer)
+
+        cache_stats = llm_cache_stats()
+        if cache_stats is not None:
+            st.caption(f"LLM cache: {cache_stats['hits']} hits / {cache_stats['misses']} misses")
 else:
     st.info("请输入有效的 Ticker 并点击 Run。")
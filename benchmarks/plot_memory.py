@@ -0,0 +1,87 @@
+"""
+Memory regression check for chart rendering.
+
+Renders many charts (uncached, alternating indicator and group plots) from a
+synthetic metrics frame and samples the process RSS along the way. Figures are
+built without pyplot, so RSS must stay flat once matplotlib's caches (fonts,
+text layout) are warm:
+
+    python benchmarks/plot_memory.py --charts 10000 --max-growth-mb 30
+
+Exit code 1 when RSS after the warm-up grew by more than --max-growth-mb.
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import resource
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src.plots import plot_by_selection, render_figure
+from src.schema import load_schema
+
+SCHEMA_PATH = ROOT / "config" / "indicators.yaml"
+
+
+def rss_mb() -> float:
+    """Current resident set size (Linux /proc), falling back to the peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * resource.getpagesize() / 1024 / 1024
+    except OSError:
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # bytes on macOS, kilobytes on Linux/BSD
+        return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--charts", type=int, default=10000)
+    parser.add_argument("--warmup", type=int, default=200, help="charts rendered before the baseline RSS sample")
+    parser.add_argument("--periods", type=int, default=10)
+    parser.add_argument("--max-growth-mb", type=float, default=30.0)
+    parser.add_argument("--dpi", type=int, default=60)
+    args = parser.parse_args()
+
+    schema = load_schema(SCHEMA_PATH)
+    rng = np.random.default_rng(0)
+    years = [str(2024 - args.periods + 1 + i) for i in range(args.periods)]
+    df = pd.DataFrame(rng.normal(0.2, 0.05, (args.periods, len(schema.indicators))), index=years, columns=list(schema.indicators))
+    selections = [{"indicator_key": k} for k in schema.indicators] + [{"group_key": k} for k in schema.groups]
+
+    def render(i: int) -> None:
+        fig = plot_by_selection(df, schema, title_prefix=f"T{i % 97:05d} - ", **selections[i % len(selections)])
+        render_figure(fig, "png", args.dpi)
+
+    for i in range(args.warmup):
+        render(i)
+    gc.collect()
+    baseline = rss_mb()
+    print(f"after {args.warmup} warm-up charts: {baseline:.1f} MB")
+
+    step = max(1, args.charts // 10)
+    t0 = time.perf_counter()
+    for i in range(args.charts):
+        render(i)
+        if (i + 1) % step == 0:
+            print(f"{i + 1:>7} charts  rss {rss_mb():8.1f} MB  ({(i + 1) / (time.perf_counter() - t0):.0f} charts/s)")
+    gc.collect()
+
+    growth = rss_mb() - baseline
+    ok = growth <= args.max_growth_mb
+    print(f"RSS growth: {growth:+.1f} MB (limit {args.max_growth_mb:.0f} MB) -> {'ok' if ok else 'LEAK'}")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,197 @@
+"""
+Benchmark suite for the metrics pipeline, plotting and prompt building.
+
+Runs against synthetic statements (benchmarks/synthetic.py) with no network,
+cache or warehouse, and writes JSON that can be diffed across commits:
+
+    python benchmarks/run_benchmarks.py --tickers 1,100,1000 --periods 5,40 --output bench.json
+    python benchmarks/run_benchmarks.py --output new.json --compare bench.json --threshold 1.25
+
+With --compare, the exit code is 1 when any benchmark's median got slower than
+`threshold` x the baseline median.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Sequence
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+sys.path.append(str(Path(__file__).resolve().parent))
+
+from src import ft_adapter
+from src.ai_agent import build_group_prompt
+from src.plots import close_figure, get_render_cache, plot_by_selection, plot_dashboard, render_by_selection
+from src.provider_health import reset_provider_health
+from src.providers import set_provider
+from src.rate_limit import RateLimiter, set_rate_limiter
+from src.schema import load_schema
+from src.statement_cache import set_statement_cache
+from src.warehouse import set_statement_warehouse
+from synthetic import SyntheticProvider, universe
+
+SCHEMA_PATH = ROOT / "config" / "indicators.yaml"
+# forces the FMP path regardless of .env, so runs are comparable
+SYNTHETIC_KEY = "synthetic"
+
+
+def _isolate(n_periods: int) -> None:
+    """Synthetic provider, no cache / warehouse / pacing: measure the code, not the I/O."""
+    set_provider(SyntheticProvider(n_periods=n_periods))
+    set_statement_cache(None)
+    set_statement_warehouse(None)
+    reset_provider_health()
+    for source in ("FinancialModelingPrep", "Yahoo Finance"):
+        set_rate_limiter(source, RateLimiter(rate=1e12, burst=10**9))
+
+
+def _measure(fn: Callable[[], Any], repeat: int, warmup: int = 1) -> Dict[str, float]:
+    for _ in range(warmup):
+        fn()
+    times: List[float] = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return {
+        "min_s": min(times),
+        "median_s": statistics.median(times),
+        "mean_s": statistics.fmean(times),
+        "max_s": max(times),
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return ""
+
+
+def run(tickers: List[int], periods: List[int], repeat: int, freqs: Sequence[str] = ("annual",)) -> List[Dict[str, Any]]:
+    results: List[Dict[str, Any]] = []
+
+    def record(name: str, params: Dict[str, Any], fn: Callable[[], Any], n: int = repeat) -> None:
+        stats = _measure(fn, n)
+        results.append({"name": name, "params": params, "repeat": n, **stats})
+        print(f"{name:<32} {json.dumps(params):<34} median {stats['median_s'] * 1000:10.2f} ms")
+
+    record("load_schema", {}, lambda: load_schema(SCHEMA_PATH))
+    schema = load_schema(SCHEMA_PATH)
+    group_key = next(iter(schema.groups))
+    indicator_key = next(iter(schema.indicators))
+
+    for p in periods:
+        _isolate(p)
+        params = {"periods": p}
+        record(
+            "get_key_metrics_timeseries", params,
+            lambda: ft_adapter.get_key_metrics_timeseries("T00000", api_key=SYNTHETIC_KEY, schema=schema),
+        )
+        record("get_key_metrics_tidy", params, lambda: ft_adapter.get_key_metrics_tidy("T00000", api_key=SYNTHETIC_KEY))
+
+        df = ft_adapter.get_key_metrics_timeseries("T00000", api_key=SYNTHETIC_KEY, schema=schema)
+
+        def plot(**selection: str) -> None:
+            close_figure(plot_by_selection(df, schema, **selection))
+
+        record("plot_by_selection[indicator]", params, lambda: plot(indicator_key=indicator_key))
+        record("plot_by_selection[group]", params, lambda: plot(group_key=group_key))
+        record("plot_dashboard", params, lambda: close_figure(plot_dashboard(df, schema)))
+        get_render_cache().clear()
+        record(
+            "render_by_selection[cached]", params,
+            lambda: render_by_selection(df, schema, group_key=group_key, title_prefix="T00000 - "),
+        )
+        record(
+            "build_group_prompt", params,
+            lambda: build_group_prompt(
+                "T00000", group_key, df, schema.groups[group_key].indicator_keys, schema, "Summarize the trend."
+            ),
+        )
+
+        for freq in freqs:
+            for n in tickers:
+                names = universe(n)
+                # annual keeps the original params so older result files stay comparable
+                panel_params = {"tickers": n, "periods": p, **({"freq": freq} if freq != "annual" else {})}
+                # big universes are slow enough that a few samples are representative
+                record(
+                    "get_key_metrics_panel", panel_params,
+                    lambda: ft_adapter.get_key_metrics_panel(names, api_key=SYNTHETIC_KEY, schema=schema, freq=freq),
+                    n=repeat if n <= 1000 else max(1, min(repeat, 3)),
+                )
+
+    return results
+
+
+def compare(results: List[Dict[str, Any]], baseline_path: Path, threshold: float) -> bool:
+    """Print median ratios against a baseline file; False if anything regressed past threshold."""
+    baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+    before = {(r["name"], json.dumps(r["params"], sort_keys=True)): r for r in baseline["results"]}
+
+    ok = True
+    print(f"\nvs {baseline_path} ({baseline.get('meta', {}).get('commit', '?')}):")
+    for r in results:
+        old = before.get((r["name"], json.dumps(r["params"], sort_keys=True)))
+        if old is None or old["median_s"] <= 0:
+            continue
+        ratio = r["median_s"] / old["median_s"]
+        flag = "REGRESSION" if ratio > threshold else ""
+        ok = ok and not flag
+        print(f"{r['name']:<32} {json.dumps(r['params']):<34} x{ratio:6.2f} {flag}")
+    return ok
+
+
+def _ints(text: str) -> List[int]:
+    return [int(x) for x in text.split(",") if x.strip()]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--tickers", default="1,100,1000", help="universe sizes for the panel benchmark (1-10000)")
+    parser.add_argument("--periods", default="5,40", help="periods per statement (5-40)")
+    parser.add_argument("--freqs", default="annual", help="panel frequencies: annual,quarterly,ttm")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path, help="write JSON results here")
+    parser.add_argument("--compare", type=Path, help="baseline JSON from an earlier run")
+    parser.add_argument("--threshold", type=float, default=1.25, help="allowed median slowdown vs baseline")
+    args = parser.parse_args()
+
+    tickers, periods = _ints(args.tickers), _ints(args.periods)
+    freqs = [f.strip() for f in args.freqs.split(",") if f.strip()]
+    results = run(tickers, periods, max(1, args.repeat), freqs)
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "tickers": tickers,
+            "periods": periods,
+            "freqs": freqs,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    if args.output:
+        args.output.write_text(json.dumps(report, indent=2), encoding="utf-8")
+        print(f"\nSaved results to: {args.output}")
+
+    if args.compare:
+        return 0 if compare(results, args.compare, args.threshold) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,111 @@
+"""
+Synthetic statement provider for benchmarks.
+
+Plugs into src/providers.py (set_provider) and answers every Toolkit statement
+call with deterministic random frames in FinanceToolkit's layout: line items as
+rows, yearly Period columns, (ticker, line item) rows for multi-ticker calls.
+No network, no fixtures on disk; size is controlled by n_periods / n_filler_rows.
+"""
+
+from __future__ import annotations
+
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+
+INCOME_ROWS = ["Revenue", "Cost of Goods Sold", "Gross Profit", "Operating Expenses", "Operating Income", "Net Income"]
+BALANCE_ROWS = [
+    "Cash and Cash Equivalents",
+    "Total Current Assets",
+    "Total Assets",
+    "Total Current Liabilities",
+    "Total Liabilities",
+    "Total Stockholders Equity",
+]
+RATIO_ROWS = {
+    "get_profitability_ratios": ["Gross Margin", "Return on Equity", "Return on Assets"],
+    "get_efficiency_ratios": ["Asset Turnover", "Return on Invested Capital"],
+    "get_valuation_ratios": ["Price Earnings Ratio", "Price to Book Ratio"],
+}
+
+
+def universe(n: int) -> List[str]:
+    return [f"T{i:05d}" for i in range(n)]
+
+
+class SyntheticProvider:
+    name = "synthetic"
+
+    def __init__(self, n_periods: int = 10, n_filler_rows: int = 20, last_year: int = 2024) -> None:
+        self.n_periods = int(n_periods)
+        self.n_filler_rows = int(n_filler_rows)
+        self.last_year = last_year
+
+    def make_toolkit(
+        self,
+        data_source: str,
+        tickers: List[str],
+        fmp_key: Optional[str] = None,
+        start_date: Optional[str] = None,
+        quarterly: bool = False,
+    ):
+        return _SyntheticToolkit(self, list(tickers), start_date, quarterly)
+
+    def frame(self, ticker: str, method: str, quarterly: bool = False) -> pd.DataFrame:
+        rng = np.random.default_rng(zlib.crc32(f"{ticker}/{method}/{quarterly}".encode()))
+        columns = pd.period_range(end=f"{self.last_year}Q4" if quarterly else str(self.last_year), periods=self.n_periods, freq="Q" if quarterly else "Y")
+        p = self.n_periods
+        filler = [f"Other Item {i}" for i in range(self.n_filler_rows)]
+
+        if method == "get_income_statement":
+            revenue = rng.uniform(1e8, 1e11) * np.cumprod(rng.uniform(0.9, 1.2, p))
+            cogs = revenue * rng.uniform(0.3, 0.8, p)
+            gross = revenue - cogs
+            opex = revenue * rng.uniform(0.05, 0.3, p)
+            operating = gross - opex
+            data = [revenue, cogs, gross, opex, operating, operating * rng.uniform(0.6, 0.9, p)]
+            rows = INCOME_ROWS
+        elif method == "get_balance_sheet_statement":
+            assets = rng.uniform(1e8, 1e11) * np.cumprod(rng.uniform(0.95, 1.15, p))
+            current_assets = assets * rng.uniform(0.2, 0.5, p)
+            liabilities = assets * rng.uniform(0.3, 0.8, p)
+            data = [
+                current_assets * 0.3,
+                current_assets,
+                assets,
+                liabilities * rng.uniform(0.2, 0.5, p),
+                liabilities,
+                assets - liabilities,
+            ]
+            rows = BALANCE_ROWS
+        else:
+            rows = RATIO_ROWS.get(method, [])
+            data = [rng.uniform(0.01, 40.0, p) for _ in rows]
+
+        values = np.vstack(data + [rng.normal(0, 1e7, p) for _ in filler]) if rows else np.empty((0, p))
+        return pd.DataFrame(values, index=rows + (filler if rows else []), columns=columns)
+
+
+class _SyntheticToolkit:
+    def __init__(self, provider: SyntheticProvider, tickers: List[str], start_date: Optional[str], quarterly: bool) -> None:
+        self._provider = provider
+        self._tickers = tickers
+        self._start_date = start_date
+        self._quarterly = quarterly
+
+    def __getattr__(self, name: str):
+        if not name.startswith("get_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._statement(name)
+
+    def _statement(self, method: str) -> pd.DataFrame:
+        frames: Dict[str, pd.DataFrame] = {t: self._provider.frame(t, method, self._quarterly) for t in self._tickers}
+        if self._start_date:
+            start = pd.Timestamp(self._start_date)
+            frames = {t: df.loc[:, df.columns.start_time >= start] for t, df in frames.items()}
+        if len(self._tickers) == 1:
+            return frames[self._tickers[0]]
+        return pd.concat(frames, axis=0)
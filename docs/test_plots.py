@@ -6,11 +6,13 @@ ROOT = Path(__file__).resolve().parents[1]
 sys.path.append(str(ROOT))
 
 from src.ft_adapter import get_key_metrics
-from src.plots import plot_two_metrics_bar
+from src.plots import plot_by_selection
+from src.schema import load_schema
 
 if __name__ == "__main__":
-    df = get_key_metrics("AAPL")  # 默认 MVP only
-    fig = plot_two_metrics_bar(df, title="AAPL Metrics")
+    df = get_key_metrics("AAPL")  # 默认 timeseries
+    schema = load_schema(ROOT / "config" / "indicators.yaml")
+    fig = plot_by_selection(df, schema, group_key="profitability_margins", title_prefix="AAPL ")
 
     out_path = "docs/aapl_metrics.png"
     fig.savefig(out_path, dpi=200)
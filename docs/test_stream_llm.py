@@ -0,0 +1,70 @@
+# docs/test_stream_llm.py
+# stream_llm 只缓存正常收尾的流：不联网，用假的 SSE 响应代替 DeepSeek
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+sys.path.append(str(ROOT))
+
+from src import ai_agent
+from src.llm_cache import LLMResponseCache, set_llm_cache
+
+
+class StubResponse:
+    def __init__(self, lines):
+        self.lines = lines
+        self.encoding = None
+        self.closed = False
+
+    def iter_lines(self, decode_unicode=False):
+        return iter(self.lines)
+
+    def close(self):
+        self.closed = True
+
+
+def sse(*tokens, done=True):
+    lines = [": keep-alive", ""]
+    for tok in tokens:
+        lines += ['data: {"choices": [{"delta": {"content": "%s"}}]}' % tok, ""]
+    if done:
+        lines += ["data: [DONE]", ""]
+    return lines
+
+
+def run_stream(lines, prompt):
+    resp = StubResponse(lines)
+    ai_agent._send_chat = lambda p, stream=False: resp
+    return "".join(ai_agent.stream_llm(prompt)), resp
+
+
+def test_truncated_stream_is_not_cached():
+    cache = LLMResponseCache(tempfile.mkdtemp())
+    set_llm_cache(cache)
+    text, resp = run_stream(sse("半截", "回答", done=False), "truncated")
+    assert text == "半截回答"
+    assert resp.closed
+    assert len(cache) == 0
+
+
+def test_complete_stream_is_cached():
+    cache = LLMResponseCache(tempfile.mkdtemp())
+    set_llm_cache(cache)
+    text, _ = run_stream(sse("完整", "回答"), "complete")
+    assert text == "完整回答"
+    assert len(cache) == 1
+    # 第二次直接命中缓存，不再请求
+    ai_agent._send_chat = None
+    assert "".join(ai_agent.stream_llm("complete")) == "完整回答"
+
+
+if __name__ == "__main__":
+    send_chat = ai_agent._send_chat
+    try:
+        test_truncated_stream_is_not_cached()
+        test_complete_stream_is_cached()
+    finally:
+        ai_agent._send_chat = send_chat
+        set_llm_cache(None)
+    print("stream_llm cache tests passed")
@@ -2,15 +2,26 @@
 
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Optional, Any, Dict, List
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass
+from typing import Optional, Any, Dict, Iterator, List, Union
 
+import contextvars
+import json
 import os
+import random
+import threading
+import time
 
 import pandas as pd
 import requests
+from requests.adapters import HTTPAdapter
 from dotenv import load_dotenv
 
+from .llm_cache import get_llm_cache, prompt_fingerprint
+from .rate_limit import get_rate_limiter
+from .tracing import span, traced
+
 load_dotenv()
 
 
@@ -33,6 +44,25 @@ class IndicatorInfo:
 # -----------------------------
 DEEPSEEK_API_BASE = "https://api.deepseek.com"
 DEEPSEEK_CHAT_PATH = "/chat/completions"
+DEEPSEEK_PROVIDER = "DeepSeek"  # rate_limit 中的限速器名称
+DEEPSEEK_MODEL = "deepseek-chat"
+DEEPSEEK_TEMPERATURE = 0.4
+SYSTEM_PROMPT = "你是一名专业的财务分析助手，擅长用简单中文解释复杂财务现象，语气冷静、中立、不夸大，不给具体投资建议。"
+
+
+# 连接池 / 超时 / 重试（均可用环境变量覆盖）
+DEFAULT_POOL_SIZE = 4
+DEFAULT_CONNECT_TIMEOUT = 5.0
+DEFAULT_READ_TIMEOUT = 60.0
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 8.0
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+def _api_base() -> str:
+    # 允许指向本地 stub server 或代理
+    return os.getenv("DEEPSEEK_API_BASE", DEEPSEEK_API_BASE).rstrip("/")
 
 
 def _get_api_key() -> str:
@@ -44,6 +74,97 @@ def _get_api_key() -> str:
     return api_key
 
 
+# -----------------------------
+# HTTP 连接池：复用 TCP/TLS 连接（keep-alive）
+# -----------------------------
+_SESSION: Optional[requests.Session] = None
+_SESSION_LOCK = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is None:
+            pool_size = int(os.getenv("LLM_POOL_SIZE", DEFAULT_POOL_SIZE))
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session = requests.Session()
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            _SESSION = session
+        return _SESSION
+
+
+def close_http_session() -> None:
+    """关闭连接池（下次调用时按当前环境变量重建）。"""
+    global _SESSION
+    with _SESSION_LOCK:
+        if _SESSION is not None:
+            _SESSION.close()
+        _SESSION = None
+
+
+def _backoff_delay(attempt: int, resp: Optional[requests.Response] = None) -> float:
+    """Retry-After 优先；否则 full-jitter 指数退避。"""
+    if resp is not None:
+        retry_after = resp.headers.get("Retry-After")
+        if retry_after:
+            try:
+                return min(float(retry_after), float(os.getenv("LLM_BACKOFF_MAX", DEFAULT_BACKOFF_MAX)))
+            except ValueError:
+                pass
+    base = float(os.getenv("LLM_BACKOFF_BASE", DEFAULT_BACKOFF_BASE))
+    cap = float(os.getenv("LLM_BACKOFF_MAX", DEFAULT_BACKOFF_MAX))
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+def _post_with_retries(
+    url: str,
+    headers: Dict[str, str],
+    payload: Dict[str, Any],
+    stream: bool = False,
+) -> requests.Response:
+    """
+    429 / 5xx 和连接失败按指数退避重试；读超时不重试（请求可能已在服务端执行）。
+    每次发送前都经过 DeepSeek 限速器；429 会让所有并发调用一起暂停。
+    """
+    session = get_http_session()
+    limiter = get_rate_limiter(DEEPSEEK_PROVIDER)
+    timeout = (
+        float(os.getenv("LLM_CONNECT_TIMEOUT", DEFAULT_CONNECT_TIMEOUT)),
+        float(os.getenv("LLM_READ_TIMEOUT", DEFAULT_READ_TIMEOUT)),
+    )
+    max_retries = max(0, int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)))
+
+    attempt = 0
+    while True:
+        limiter.acquire()
+        try:
+            resp = session.post(url, headers=headers, json=payload, timeout=timeout, stream=stream)
+        except requests.ConnectionError:
+            if attempt >= max_retries:
+                raise
+            time.sleep(_backoff_delay(attempt))
+            attempt += 1
+            continue
+
+        if resp.status_code == 429:
+            retry_after = resp.headers.get("Retry-After")
+            try:
+                limiter.report_throttled(float(retry_after) if retry_after else None)
+            except ValueError:
+                limiter.report_throttled()
+        elif resp.status_code < 500:
+            limiter.report_success()
+
+        if resp.status_code not in RETRY_STATUS or attempt >= max_retries:
+            return resp
+        # 429 的等待由限速器负责（下一次 acquire 会阻塞）
+        delay = 0.0 if resp.status_code == 429 else _backoff_delay(attempt, resp)
+        resp.close()
+        time.sleep(delay)
+        attempt += 1
+
+
 # -----------------------------
 # 单指标 Prompt
 # -----------------------------
@@ -159,21 +280,37 @@ def build_group_prompt(
 # -----------------------------
 # 调用 DeepSeek LLM
 # -----------------------------
-def call_llm(prompt: str) -> str:
+@traced("llm.call_llm")
+def call_llm(prompt: str, use_cache: bool = True) -> str:
+    # 相同 (model, temperature, system prompt, prompt) 直接返回缓存结果，避免重复计费
+    cache = get_llm_cache() if use_cache else None
+    key = prompt_fingerprint(DEEPSEEK_MODEL, DEEPSEEK_TEMPERATURE, SYSTEM_PROMPT, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            return cached
+
+    content = _request_completion(prompt)
+    if cache is not None:
+        cache.put(key, content, DEEPSEEK_MODEL)
+    return content
+
+
+def _chat_request(prompt: str, stream: bool = False) -> tuple:
     api_key = _get_api_key()
 
-    url = DEEPSEEK_API_BASE + DEEPSEEK_CHAT_PATH
+    url = _api_base() + DEEPSEEK_CHAT_PATH
     headers = {
         "Authorization": f"Bearer {api_key}",
         "Content-Type": "application/json",
     }
     payload = {
-        "model": "deepseek-chat",
-        "temperature": 0.4,
+        "model": DEEPSEEK_MODEL,
+        "temperature": DEEPSEEK_TEMPERATURE,
         "messages": [
             {
                 "role": "system",
-                "content": "你是一名专业的财务分析助手，擅长用简单中文解释复杂财务现象，语气冷静、中立、不夸大，不给具体投资建议。",
+                "content": SYSTEM_PROMPT,
             },
             {
                 "role": "user",
@@ -181,9 +318,16 @@ def call_llm(prompt: str) -> str:
             },
         ],
     }
+    if stream:
+        payload["stream"] = True
+    return url, headers, payload
+
+
+def _send_chat(prompt: str, stream: bool = False) -> requests.Response:
+    url, headers, payload = _chat_request(prompt, stream)
 
     try:
-        resp = requests.post(url, headers=headers, json=payload, timeout=30)
+        resp = _post_with_retries(url, headers, payload, stream=stream)
     except requests.RequestException as e:
         raise AIConfigError(f"调用 DeepSeek API 失败（网络问题）：{e}") from e
 
@@ -195,8 +339,11 @@ def call_llm(prompt: str) -> str:
         raise AIConfigError(
             f"DeepSeek API 返回错误状态码 {resp.status_code}，详情：{data}"
         )
+    return resp
+
 
-    data = resp.json()
+def _request_completion(prompt: str) -> str:
+    data = _send_chat(prompt).json()
     try:
         content = data["choices"][0]["message"]["content"]
     except Exception as e:
@@ -205,6 +352,85 @@ def call_llm(prompt: str) -> str:
     return content.strip()
 
 
+class _SSEDeltas:
+    """
+    解析 SSE：逐行读取 `data: {...}`，遇到 `data: [DONE]` 结束。
+    complete 表示流是否正常收尾（收到 [DONE] 或 finish_reason=stop）；
+    代理/服务端中途干净地断开连接时迭代同样会结束，但 complete 仍为 False。
+    """
+
+    def __init__(self, resp: requests.Response) -> None:
+        self.resp = resp
+        self.complete = False
+
+    def __iter__(self) -> Iterator[str]:
+        # SSE 规范固定为 UTF-8；未声明 charset 时 requests 会按 latin-1 解码
+        self.resp.encoding = "utf-8"
+        for line in self.resp.iter_lines(decode_unicode=True):
+            if not line or not line.startswith("data:"):
+                continue  # 空行分隔事件；忽略 `: keep-alive` 注释等
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                self.complete = True
+                return
+            try:
+                choice = json.loads(data)["choices"][0]
+                delta = choice.get("delta", {}).get("content")
+            except Exception as e:
+                raise AIConfigError(f"解析 DeepSeek 流式返回失败：{data}") from e
+            if choice.get("finish_reason") == "stop":
+                self.complete = True
+            if delta:
+                yield delta
+
+
+def stream_llm(prompt: str, use_cache: bool = True) -> Iterator[str]:
+    """
+    call_llm 的流式版本（stream=True + SSE），逐段 yield 文本。
+    缓存命中时一次性返回完整答案；完整读完的流才会写入缓存。
+    """
+    cache = get_llm_cache() if use_cache else None
+    key = prompt_fingerprint(DEEPSEEK_MODEL, DEEPSEEK_TEMPERATURE, SYSTEM_PROMPT, prompt)
+    if cache is not None:
+        cached = cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    resp: Optional[requests.Response] = None
+    parts: List[str] = []
+    try:
+        # 首包耗时算到第一段内容到达为止（响应头先到，正文可能还要等）
+        with span("llm.stream_first_byte"):
+            resp = _send_chat(prompt, stream=True)
+            stream = _SSEDeltas(resp)
+            deltas = iter(stream)
+            first = next(deltas, None)
+        if first is not None:
+            parts.append(first)
+            yield first
+        for delta in deltas:
+            parts.append(delta)
+            yield delta
+    except requests.RequestException as e:
+        raise AIConfigError(f"DeepSeek 流式连接中断：{e}") from e
+    finally:
+        if resp is not None:
+            resp.close()
+
+    # 没有正常收尾的流（中途被截断）不写缓存，下次重新请求
+    if cache is not None and parts and stream.complete:
+        cache.put(key, "".join(parts).strip(), DEEPSEEK_MODEL)
+
+
+def llm_cache_stats() -> Optional[Dict[str, int]]:
+    """LLM 响应缓存的命中/未命中计数（缓存关闭时返回 None）。"""
+    cache = get_llm_cache()
+    if cache is None:
+        return None
+    return {**asdict(cache.stats), "entries": len(cache)}
+
+
 # -----------------------------
 # 对外主函数：单指标分析
 # -----------------------------
@@ -214,7 +440,8 @@ def analyze_indicator_timeseries(
     indicator_key: str,
     schema: Optional[Any] = None,
     user_prompt: str = "",
-) -> str:
+    stream: bool = False,
+) -> Union[str, Iterator[str]]:
     if indicator_key not in df.columns:
         raise ValueError(f"DataFrame 中不存在指标列: {indicator_key}")
 
@@ -245,7 +472,8 @@ def analyze_indicator_timeseries(
         user_prompt=user_prompt,
     )
 
-    return call_llm(prompt)
+    # stream=True 返回文本片段的生成器（用于 st.write_stream）
+    return stream_llm(prompt) if stream else call_llm(prompt)
 
 
 # -----------------------------
@@ -257,7 +485,8 @@ def analyze_group_timeseries(
     group_key: str,
     schema: Any,
     user_prompt: str = "",
-) -> str:
+    stream: bool = False,
+) -> Union[str, Iterator[str]]:
     """
     对一个指标组（多指标组合）的时间序列进行 AI 分析。
 
@@ -265,7 +494,11 @@ def analyze_group_timeseries(
     - schema.groups: Dict[str, GroupMeta]
     - GroupMeta.indicator_keys: List[str]
     """
+    prompt = _group_prompt(ticker, df, group_key, schema, user_prompt)
+    return stream_llm(prompt) if stream else call_llm(prompt)
+
 
+def _group_prompt(ticker: str, df: pd.DataFrame, group_key: str, schema: Any, user_prompt: str) -> str:
     # 1) 取出 GroupMeta 对象
     groups: Dict[str, Any] = schema.groups
     if group_key not in groups:
@@ -289,8 +522,8 @@ def analyze_group_timeseries(
             f"组 {group_key} 中的所有指标在 DataFrame 中都不存在或没有数据，无法分析。"
         )
 
-    # 4) 构造 Prompt 并调用 DeepSeek
-    prompt = build_group_prompt(
+    # 4) 构造 Prompt
+    return build_group_prompt(
         ticker=ticker,
         group_key=group_key,
         df=df,
@@ -299,4 +532,85 @@ def analyze_group_timeseries(
         user_prompt=user_prompt,
     )
 
-    return call_llm(prompt)
+
+# -----------------------------
+# 对外主函数：全部指标组并发分析
+# -----------------------------
+DEFAULT_LLM_CONCURRENCY = 4
+
+
+@dataclass
+class GroupAnalysis:
+    group_key: str
+    display_name: str
+    answer: Optional[str] = None
+    error: Optional[str] = None
+    elapsed_s: float = 0.0
+
+
+@dataclass
+class GroupsReport:
+    ticker: str
+    analyses: List[GroupAnalysis]
+    elapsed_s: float = 0.0
+
+    @property
+    def succeeded(self) -> List[GroupAnalysis]:
+        return [a for a in self.analyses if a.answer is not None]
+
+    @property
+    def failed(self) -> List[GroupAnalysis]:
+        return [a for a in self.analyses if a.answer is None]
+
+    def to_markdown(self) -> str:
+        parts: List[str] = []
+        for a in self.analyses:
+            body = a.answer if a.answer is not None else f"_分析失败：{a.error}_"
+            parts.append(f"### {a.display_name}\n\n{body}")
+        return "\n\n".join(parts)
+
+
+def analyze_all_groups(
+    ticker: str,
+    df: pd.DataFrame,
+    schema: Any,
+    user_prompt: str = "",
+    max_concurrency: Optional[int] = None,
+) -> GroupsReport:
+    """
+    对 schema.groups 中的每个指标组生成 AI 分析，并发调用 DeepSeek。
+
+    - 并发上限：max_concurrency（默认 LLM_MAX_CONCURRENCY 环境变量或 4）
+    - 限速：所有请求共享 DeepSeek 限速器（LLM_RATE）
+    - 单个组失败（无数据 / API 错误）只记录在对应条目里，不影响其他组
+    总耗时接近单次调用，而不是 N 次调用之和。
+    """
+    started = time.perf_counter()
+    analyses: Dict[str, GroupAnalysis] = {}
+    prompts: Dict[str, str] = {}
+
+    # Prompt 构造很快，先串行完成；数据不足的组直接记为失败
+    for group_key, meta in schema.groups.items():
+        analyses[group_key] = GroupAnalysis(group_key, getattr(meta, "display_name", group_key))
+        try:
+            prompts[group_key] = _group_prompt(ticker, df, group_key, schema, user_prompt)
+        except ValueError as e:
+            analyses[group_key].error = str(e)
+
+    def run(group_key: str, prompt: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            analyses[group_key].answer = call_llm(prompt)
+        except Exception as e:
+            analyses[group_key].error = str(e)
+        analyses[group_key].elapsed_s = time.perf_counter() - t0
+
+    if prompts:
+        limit = max_concurrency or int(os.getenv("LLM_MAX_CONCURRENCY", DEFAULT_LLM_CONCURRENCY))
+        with ThreadPoolExecutor(max_workers=max(1, min(limit, len(prompts))), thread_name_prefix="llm") as pool:
+            # 每个任务在调用方 context 的副本中运行，tracing span 保持父子关系
+            futures = [pool.submit(contextvars.copy_context().run, run, k, p) for k, p in prompts.items()]
+            for fut in futures:
+                fut.result()
+
+    return GroupsReport(ticker, list(analyses.values()), time.perf_counter() - started)
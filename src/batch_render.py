@@ -0,0 +1,233 @@
+"""
+Batch chart rendering for report generation.
+
+Renders one image per (ticker x indicator) and (ticker x group) from a metrics
+panel (get_key_metrics_panel output: rows (ticker, period), columns indicator
+keys) on a spawn-started process pool. Each worker renders all charts of one ticker with the
+Agg canvas and writes the files itself, so only small per-ticker frames and
+counters cross process boundaries.
+
+Memory stays bounded: at most `window` tickers are queued at a time, and
+workers are recycled after `maxtasksperchild` tickers. A worker that dies hard
+costs at most the ticker that killed it, never a hung batch.
+
+    python -m src.batch_render --tickers AAPL,MSFT,NVDA --out reports/charts --processes 4
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import re
+import time
+from concurrent.futures import ALL_COMPLETED, FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+from .plots import PlotError, plot_by_selection, render_figure
+from .schema import Schema
+
+
+DEFAULT_MAXTASKSPERCHILD = 50
+
+
+@dataclass
+class BatchRenderReport:
+    tickers: int = 0
+    charts: int = 0
+    failed: int = 0
+    bytes_written: int = 0
+    elapsed_s: float = 0.0
+    errors: List[Tuple[str, str, str]] = field(default_factory=list)  # (ticker, chart, error)
+
+    @property
+    def charts_per_s(self) -> float:
+        return self.charts / self.elapsed_s if self.elapsed_s > 0 else 0.0
+
+
+def _slug(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", s)
+
+
+def chart_selections(schema: Schema) -> List[Tuple[str, Dict[str, str]]]:
+    """(file stem, plot_by_selection kwargs) for every indicator and group."""
+    return [(f"indicator_{k}", {"indicator_key": k}) for k in schema.indicators] + [
+        (f"group_{k}", {"group_key": k}) for k in schema.groups
+    ]
+
+
+# -----------------------------
+# worker side
+# -----------------------------
+_WORKER: Dict[str, Any] = {}
+
+
+def _init_worker(schema: Schema, out_dir: str, fmt: str, dpi: int) -> None:
+    _WORKER.update(schema=schema, out_dir=Path(out_dir), fmt=fmt, dpi=dpi, selections=chart_selections(schema))
+
+
+def _render_ticker(ticker: str, df: pd.DataFrame) -> Tuple[str, int, int, List[Tuple[str, str]]]:
+    """Render and write all charts of one ticker; returns (ticker, charts, bytes, errors)."""
+    schema, fmt, dpi = _WORKER["schema"], _WORKER["fmt"], _WORKER["dpi"]
+    target = _WORKER["out_dir"] / _slug(ticker)
+    target.mkdir(parents=True, exist_ok=True)
+
+    charts, written = 0, 0
+    errors: List[Tuple[str, str]] = []
+    for stem, selection in _WORKER["selections"]:
+        try:
+            data = render_figure(plot_by_selection(df, schema, title_prefix=f"{ticker} - ", **selection), fmt, dpi)
+        except PlotError as e:
+            errors.append((stem, str(e)))
+            continue
+        (target / f"{stem}.{fmt}").write_bytes(data)
+        charts += 1
+        written += len(data)
+    return ticker, charts, written, errors
+
+
+# -----------------------------
+# parent side
+# -----------------------------
+# fresh interpreters: the parent holds threads (limiters, revalidation), SQLite
+# connections and sockets by the time it renders, none of which survive fork()
+DEFAULT_MP_CONTEXT = "spawn"
+
+_Item = Tuple[str, pd.DataFrame]
+
+
+def render_panel(
+    panel: pd.DataFrame,
+    schema: Schema,
+    out_dir: str | Path,
+    *,
+    fmt: str = "png",
+    dpi: int = 100,
+    processes: Optional[int] = None,
+    maxtasksperchild: int = DEFAULT_MAXTASKSPERCHILD,
+    window: Optional[int] = None,
+    mp_context: Optional[str] = DEFAULT_MP_CONTEXT,
+) -> BatchRenderReport:
+    """
+    Render every (ticker x indicator/group) chart of `panel` into out_dir/<ticker>/.
+
+    processes:  worker count (default: os.cpu_count())
+    window:     tickers in flight at once (default: 4 x processes)
+    mp_context: multiprocessing start method (default "spawn"; "fork" disables
+                worker recycling)
+
+    A worker that dies hard (segfault, OOM kill, os._exit) breaks the pool: the
+    remaining tickers continue on a new pool, and the tickers that were in
+    flight are retried one at a time, so only the one that kills its worker
+    again is reported as failed.
+    """
+    processes = max(1, processes or os.cpu_count() or 1)
+    window = max(1, window or 4 * processes)
+    report = BatchRenderReport()
+    ctx = multiprocessing.get_context(mp_context)
+    recycle = maxtasksperchild if ctx.get_start_method() != "fork" else None
+
+    def run_pool(items: Iterator[_Item], workers: int, limit: int, crashed: List[_Item]) -> bool:
+        """Render items on one pool; returns True (in-flight tickers added to crashed) if the pool broke."""
+        inflight: Dict[Future, _Item] = {}
+        with ProcessPoolExecutor(
+            workers,
+            mp_context=ctx,
+            initializer=_init_worker,
+            initargs=(schema, str(out_dir), fmt, dpi),
+            max_tasks_per_child=recycle,
+        ) as pool:
+
+            def collect(return_when: str) -> bool:
+                finished, _ = wait(inflight, return_when=return_when)
+                broken = False
+                for future in finished:
+                    item = inflight.pop(future)
+                    try:
+                        ticker, charts, written, errors = future.result()
+                    except BrokenProcessPool:
+                        crashed.append(item)
+                        broken = True
+                        continue
+                    except Exception as exc:
+                        report.failed += 1
+                        report.errors.append((item[0], "*", f"{type(exc).__name__}: {exc}"))
+                        continue
+                    report.tickers += 1
+                    report.charts += charts
+                    report.bytes_written += written
+                    report.failed += len(errors)
+                    report.errors.extend((ticker, stem, err) for stem, err in errors)
+                return broken
+
+            broken = False
+            for item in items:
+                broken = len(inflight) >= limit and collect(FIRST_COMPLETED)
+                if not broken:
+                    try:
+                        inflight[pool.submit(_render_ticker, *item)] = item
+                    except BrokenProcessPool:
+                        broken = True
+                if broken:
+                    crashed.append(item)
+                    break
+            if inflight and collect(ALL_COMPLETED):
+                broken = True
+        return broken
+
+    Path(out_dir).mkdir(parents=True, exist_ok=True)
+    started = time.perf_counter()
+    todo = ((str(ticker), frame.droplevel(0)) for ticker, frame in panel.groupby(level=0, sort=False))
+    crashed: List[_Item] = []
+    while run_pool(todo, processes, window, crashed):
+        pass
+    # one at a time on a fresh worker: only a ticker that kills it again fails
+    for item in crashed:
+        again: List[_Item] = []
+        run_pool(iter([item]), 1, 1, again)
+        if again:
+            report.failed += 1
+            report.errors.append((item[0], "*", "BrokenProcessPool: worker process died"))
+    report.elapsed_s = time.perf_counter() - started
+    return report
+
+
+def main() -> int:
+    import argparse
+
+    from .ft_adapter import get_key_metrics_panel
+    from .schema import load_schema
+
+    root = Path(__file__).resolve().parents[1]
+    parser = argparse.ArgumentParser(description="Render all indicator / group charts for a list of tickers.")
+    parser.add_argument("--tickers", required=True, help="comma-separated tickers, or @file with one per line")
+    parser.add_argument("--out", type=Path, default=root / "reports" / "charts")
+    parser.add_argument("--schema", type=Path, default=root / "config" / "indicators.yaml")
+    parser.add_argument("--format", default="png", choices=["png", "svg"])
+    parser.add_argument("--dpi", type=int, default=100)
+    parser.add_argument("--processes", type=int, default=None)
+    parser.add_argument("--offline", action="store_true", help="compute the panel from the statement warehouse only")
+    args = parser.parse_args()
+
+    text = Path(args.tickers[1:]).read_text(encoding="utf-8") if args.tickers.startswith("@") else args.tickers
+    tickers = [t.strip().upper() for t in re.split(r"[,\s]+", text) if t.strip()]
+    schema = load_schema(args.schema)
+
+    panel = get_key_metrics_panel(tickers, schema=schema, offline=args.offline)
+    report = render_panel(panel, schema, args.out, fmt=args.format, dpi=args.dpi, processes=args.processes)
+
+    print(
+        f"Rendered {report.charts} charts for {report.tickers} tickers in {report.elapsed_s:.1f}s "
+        f"({report.charts_per_s:.1f} charts/s, {report.bytes_written / 1e6:.1f} MB, {report.failed} failed)"
+    )
+    for ticker, stem, err in report.errors[:20]:
+        print(f"  {ticker} {stem}: {err}")
+    return 0 if report.charts or not report.failed else 1
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
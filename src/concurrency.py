@@ -0,0 +1,112 @@
+"""
+Bounded-concurrency fetch layer for ft_adapter.
+
+Independent provider requests (statements of one ticker, batch calls of one
+panel chunk) run on a shared thread pool. Two kinds of limits apply to every
+provider call:
+- a per-provider semaphore (FMP and Yahoo have different tolerance)
+- a global semaphore across all providers
+
+Limits are taken only around the network call itself, so cache hits never wait.
+"""
+
+from __future__ import annotations
+
+import contextvars
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, Optional, Tuple, TypeVar
+
+
+T = TypeVar("T")
+
+DEFAULT_GLOBAL_LIMIT = 8
+DEFAULT_PROVIDER_LIMITS: Dict[str, int] = {
+    "FinancialModelingPrep": 4,
+    "Yahoo Finance": 2,
+}
+FALLBACK_PROVIDER_LIMIT = 2
+
+
+class FetchLimits:
+    def __init__(self, global_limit: int = DEFAULT_GLOBAL_LIMIT, per_provider: Optional[Dict[str, int]] = None) -> None:
+        self.global_limit = max(1, int(global_limit))
+        self.per_provider = dict(DEFAULT_PROVIDER_LIMITS)
+        if per_provider:
+            self.per_provider.update(per_provider)
+
+        self._global = threading.BoundedSemaphore(self.global_limit)
+        self._providers: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _provider_semaphore(self, provider: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            sem = self._providers.get(provider)
+            if sem is None:
+                sem = threading.BoundedSemaphore(max(1, int(self.per_provider.get(provider, FALLBACK_PROVIDER_LIMIT))))
+                self._providers[provider] = sem
+            return sem
+
+    @contextmanager
+    def slot(self, provider: str) -> Iterator[None]:
+        """Hold one provider slot and one global slot for the duration of a call."""
+        # provider first, so a throttled provider does not sit on global slots
+        with self._provider_semaphore(provider):
+            with self._global:
+                yield
+
+
+def _limits_from_env() -> FetchLimits:
+    per_provider: Dict[str, int] = {}
+    if os.getenv("FT_FMP_CONCURRENCY"):
+        per_provider["FinancialModelingPrep"] = int(os.environ["FT_FMP_CONCURRENCY"])
+    if os.getenv("FT_YAHOO_CONCURRENCY"):
+        per_provider["Yahoo Finance"] = int(os.environ["FT_YAHOO_CONCURRENCY"])
+    return FetchLimits(int(os.getenv("FT_MAX_CONCURRENCY", DEFAULT_GLOBAL_LIMIT)), per_provider)
+
+
+_LIMITS = _limits_from_env()
+# the pool only schedules work; the semaphores decide how much of it hits the network
+_EXECUTOR = ThreadPoolExecutor(max_workers=32, thread_name_prefix="ft-fetch")
+
+
+def configure_fetch_limits(global_limit: int = DEFAULT_GLOBAL_LIMIT, per_provider: Optional[Dict[str, int]] = None) -> FetchLimits:
+    """Replace the process-wide limits (affects calls started afterwards)."""
+    global _LIMITS
+    _LIMITS = FetchLimits(global_limit, per_provider)
+    return _LIMITS
+
+
+def get_fetch_limits() -> FetchLimits:
+    return _LIMITS
+
+
+def provider_slot(provider: str):
+    return _LIMITS.slot(provider)
+
+
+def run_concurrently(jobs: Dict[Hashable, Callable[[], T]]) -> Dict[Hashable, Tuple[Optional[T], Optional[BaseException]]]:
+    """
+    Run independent jobs on the shared pool and wait for all of them.
+
+    Returns key -> (result, exception); one failing job does not cancel the rest.
+    A single job runs inline. Jobs must not call run_concurrently themselves.
+    """
+    if len(jobs) == 1:
+        (key, job), = jobs.items()
+        try:
+            return {key: (job(), None)}
+        except Exception as e:
+            return {key: (None, e)}
+
+    # each job runs in a copy of the caller's context, so tracing spans keep their parent
+    futures = {key: _EXECUTOR.submit(contextvars.copy_context().run, job) for key, job in jobs.items()}
+    out: Dict[Hashable, Tuple[Optional[T], Optional[BaseException]]] = {}
+    for key, fut in futures.items():
+        try:
+            out[key] = (fut.result(), None)
+        except Exception as e:
+            out[key] = (None, e)
+    return out
@@ -0,0 +1,295 @@
+"""
+Compiler for the `formula` field of config/indicators.yaml.
+
+Formulas are parsed once (at load_schema time) into a shared expression DAG:
+- identifiers are line items (e.g. revenue) or other indicator keys
+- supported syntax: numbers, identifiers, + - * /, unary minus, parentheses
+- identical sub-expressions across indicators are evaluated once
+- division is a safe divide: x/0 and inf results become NaN
+
+evaluate() runs the whole DAG with vectorized NumPy ops on arrays of any
+shape, so adding an indicator costs a YAML edit and no extra data pass.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass, field
+from typing import Callable, Collection, Dict, List, Mapping, Optional, Tuple, Union
+
+import numpy as np
+
+
+class FormulaError(ValueError):
+    """Raised when a formula cannot be parsed, references an unknown name, or the formulas form a cycle."""
+
+
+# -----------------------------
+# AST
+# -----------------------------
+@dataclass(frozen=True)
+class Num:
+    value: float
+
+
+@dataclass(frozen=True)
+class Ref:
+    name: str
+
+
+@dataclass(frozen=True)
+class Neg:
+    operand: "Node"
+
+
+@dataclass(frozen=True)
+class BinOp:
+    op: str
+    left: "Node"
+    right: "Node"
+
+
+Node = Union[Num, Ref, Neg, BinOp]
+
+
+# -----------------------------
+# Parser
+# -----------------------------
+_TOKEN_RE = re.compile(r"\s*(?:(\d+(?:\.\d*)?(?:[eE][+-]?\d+)?|\.\d+)|([A-Za-z_][A-Za-z0-9_]*)|(.))")
+
+
+def _tokenize(text: str) -> List[Tuple[str, str]]:
+    tokens: List[Tuple[str, str]] = []
+    pos = 0
+    text = text.rstrip()
+    while pos < len(text):
+        m = _TOKEN_RE.match(text, pos)
+        if m is None:
+            break
+        number, name, op = m.groups()
+        if number is not None:
+            tokens.append(("num", number))
+        elif name is not None:
+            tokens.append(("name", name))
+        elif op in "+-*/()":
+            tokens.append(("op", op))
+        else:
+            raise FormulaError(f"Unexpected character {op!r} in formula {text!r}")
+        pos = m.end()
+    return tokens
+
+
+class _Parser:
+    """expr := term (('+'|'-') term)* ; term := unary (('*'|'/') unary)* ; unary := '-' unary | atom"""
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.tokens = _tokenize(text)
+        self.pos = 0
+
+    def _peek(self) -> Tuple[str, str]:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else ("eof", "")
+
+    def _take(self) -> Tuple[str, str]:
+        tok = self._peek()
+        self.pos += 1
+        return tok
+
+    def parse(self) -> Node:
+        if not self.tokens:
+            raise FormulaError("Empty formula")
+        node = self._expr()
+        if self._peek()[0] != "eof":
+            raise FormulaError(f"Unexpected token {self._peek()[1]!r} in formula {self.text!r}")
+        return node
+
+    def _expr(self) -> Node:
+        node = self._term()
+        while self._peek() in (("op", "+"), ("op", "-")):
+            op = self._take()[1]
+            node = BinOp(op, node, self._term())
+        return node
+
+    def _term(self) -> Node:
+        node = self._unary()
+        while self._peek() in (("op", "*"), ("op", "/")):
+            op = self._take()[1]
+            node = BinOp(op, node, self._unary())
+        return node
+
+    def _unary(self) -> Node:
+        if self._peek() == ("op", "-"):
+            self._take()
+            return Neg(self._unary())
+        if self._peek() == ("op", "+"):
+            self._take()
+            return self._unary()
+        return self._atom()
+
+    def _atom(self) -> Node:
+        kind, value = self._take()
+        if kind == "num":
+            return Num(float(value))
+        if kind == "name":
+            return Ref(value)
+        if (kind, value) == ("op", "("):
+            node = self._expr()
+            if self._take() != ("op", ")"):
+                raise FormulaError(f"Missing ')' in formula {self.text!r}")
+            return node
+        if kind == "eof":
+            raise FormulaError(f"Unexpected end of formula {self.text!r}")
+        raise FormulaError(f"Unexpected token {value!r} in formula {self.text!r}")
+
+
+def parse_formula(text: str) -> Node:
+    return _Parser(str(text)).parse()
+
+
+def _refs(node: Node) -> List[str]:
+    if isinstance(node, Ref):
+        return [node.name]
+    if isinstance(node, Neg):
+        return _refs(node.operand)
+    if isinstance(node, BinOp):
+        return _refs(node.left) + _refs(node.right)
+    return []
+
+
+# -----------------------------
+# Compiled DAG
+# -----------------------------
+@dataclass(frozen=True)
+class _Step:
+    kind: str          # "input" | "const" | "neg" | "+" | "-" | "*" | "/"
+    args: Tuple = ()   # input name / constant / operand slots
+
+
+@dataclass(frozen=True)
+class FormulaSet:
+    """
+    All indicator formulas compiled into one deduplicated instruction list.
+
+    inputs:  line items referenced by at least one formula (evaluation order)
+    outputs: indicator_key -> slot holding its result
+    """
+    formulas: Dict[str, str]
+    inputs: List[str]
+    steps: List[_Step] = field(repr=False)
+    outputs: Dict[str, int] = field(repr=False)
+
+    @property
+    def keys(self) -> List[str]:
+        return list(self.outputs)
+
+    def evaluate(
+        self,
+        inputs: Union[Mapping[str, np.ndarray], Callable[[str], np.ndarray]],
+        keys: List[str] | None = None,
+    ) -> Dict[str, np.ndarray]:
+        """Evaluate the DAG once; each shared sub-expression is computed a single time."""
+        get = inputs if callable(inputs) else inputs.__getitem__
+        slots: List[np.ndarray] = []
+        with np.errstate(divide="ignore", invalid="ignore", over="ignore"):
+            for step in self.steps:
+                if step.kind == "input":
+                    value = np.asarray(get(step.args[0]), dtype=np.float64)
+                elif step.kind == "const":
+                    value = np.float64(step.args[0])
+                elif step.kind == "neg":
+                    value = -slots[step.args[0]]
+                else:
+                    a, b = slots[step.args[0]], slots[step.args[1]]
+                    if step.kind == "+":
+                        value = a + b
+                    elif step.kind == "-":
+                        value = a - b
+                    elif step.kind == "*":
+                        value = a * b
+                    else:
+                        value = a / b
+                        value = np.where(np.isfinite(value), value, np.nan)
+                slots.append(value)
+
+        wanted = self.keys if keys is None else keys
+        return {k: slots[self.outputs[k]] for k in wanted}
+
+
+def compile_formulas(formulas: Mapping[str, str], line_items: Optional[Collection[str]] = None) -> FormulaSet:
+    """
+    Parse {indicator_key: formula} into a FormulaSet.
+
+    A formula may reference another indicator by key; those are inlined in
+    dependency order, and reference cycles raise FormulaError. When line_items
+    is given, any other name must be one of them.
+    """
+    parsed: Dict[str, Node] = {}
+    for key, text in formulas.items():
+        try:
+            parsed[key] = parse_formula(text)
+        except FormulaError as e:
+            raise FormulaError(f"Indicator '{key}': {e}") from None
+
+    if line_items is not None:
+        for key, node in parsed.items():
+            unknown = [ref for ref in _refs(node) if ref not in parsed and ref not in line_items]
+            if unknown:
+                raise FormulaError(f"Indicator '{key}': unknown line item(s) {', '.join(map(repr, unknown))}")
+
+    # topological order over indicator -> indicator references
+    order: List[str] = []
+    state: Dict[str, int] = {}
+
+    def visit(key: str, path: List[str]) -> None:
+        if state.get(key) == 2:
+            return
+        if state.get(key) == 1:
+            raise FormulaError(f"Formula cycle: {' -> '.join(path + [key])}")
+        state[key] = 1
+        for ref in _refs(parsed[key]):
+            if ref in parsed:
+                visit(ref, path + [key])
+        state[key] = 2
+        order.append(key)
+
+    for key in parsed:
+        visit(key, [])
+
+    steps: List[_Step] = []
+    memo: Dict[_Step, int] = {}
+    inputs: List[str] = []
+    outputs: Dict[str, int] = {}
+
+    def emit(step: _Step) -> int:
+        if step not in memo:
+            memo[step] = len(steps)
+            steps.append(step)
+        return memo[step]
+
+    def lower(node: Node) -> int:
+        if isinstance(node, Num):
+            return emit(_Step("const", (node.value,)))
+        if isinstance(node, Ref):
+            if node.name in outputs:
+                return outputs[node.name]
+            if node.name not in inputs:
+                inputs.append(node.name)
+            return emit(_Step("input", (node.name,)))
+        if isinstance(node, Neg):
+            return emit(_Step("neg", (lower(node.operand),)))
+        left, right = lower(node.left), lower(node.right)
+        if node.op in "+*" and right < left:
+            # commutative: canonical operand order so a*b and b*a share a slot
+            left, right = right, left
+        return emit(_Step(node.op, (left, right)))
+
+    for key in order:
+        outputs[key] = lower(parsed[key])
+
+    # keep caller's key order for outputs
+    return FormulaSet(
+        formulas=dict(formulas),
+        inputs=inputs,
+        steps=steps,
+        outputs={k: outputs[k] for k in formulas},
+    )
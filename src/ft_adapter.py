@@ -13,8 +13,12 @@ from __future__ import annotations
 from dotenv import load_dotenv
 load_dotenv()
 
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any, Tuple
+from dataclasses import dataclass, field
+from functools import lru_cache, partial
+from pathlib import Path
+from typing import Optional, List, Dict, Any, Sequence, Callable, Tuple
+import asyncio
+import hashlib
 import os
 
 import numpy as np
@@ -22,6 +26,18 @@ import pandas as pd
 
 from financetoolkit import Toolkit
 
+from .concurrency import provider_slot, run_concurrently
+from .formula import FormulaSet
+from .metric_engine import FREQS, CleanStatement, clean_statement, compute_metrics_panel
+from .provider_health import provider_breaker
+from .providers import get_provider, seed_toolkit
+from .rate_limit import get_rate_limiter, is_rate_limit_error, retry_after_seconds
+from .schema import Schema, load_schema
+from .singleflight import SingleFlight
+from .statement_cache import force_refresh_active, get_statement_cache
+from .tracing import span, traced
+from .warehouse import get_statement_warehouse
+
 
 # -----------------------------
 # Existing tidy metric specs (kept)
@@ -46,33 +62,6 @@ METRICS: List[MetricSpec] = [
 # -----------------------------
 # Helpers (from your original, kept)
 # -----------------------------
-def _as_float(x) -> float:
-    try:
-        return float(x)
-    except Exception:
-        return np.nan
-
-
-def _clean_missing(series: pd.Series) -> pd.Series:
-    """
-    Finance data sometimes uses 0.0 as placeholder for missing.
-    Convert 0.0 placeholders to NaN only when it looks like missing.
-    """
-    s = series.copy()
-
-    # if entire series zeros -> keep it
-    if (pd.to_numeric(s, errors="coerce").fillna(0) == 0).all():
-        return pd.to_numeric(s, errors="coerce")
-
-    s_num = pd.to_numeric(s, errors="coerce")
-
-    # Treat exact 0 as missing if there are other non-zero values
-    if (s_num == 0).any() and (s_num != 0).any():
-        s_num = s_num.replace(0, np.nan)
-
-    return s_num
-
-
 def _latest_period_from_columns(df: pd.DataFrame) -> Optional[Any]:
     if df is None or df.empty:
         return None
@@ -84,7 +73,7 @@ def _latest_period_from_columns(df: pd.DataFrame) -> Optional[Any]:
 
 
 # -----------------------------
-# Toolkit init with FMP -> Yahoo fallback (same idea as yours)
+# Provider selection with FMP -> Yahoo fallback (same idea as yours)
 # -----------------------------
 def _unwrap_statement(obj: Any, ticker: str) -> pd.DataFrame:
     """Unwrap FinanceToolkit return types: DataFrame or dict[ticker] -> DataFrame."""
@@ -94,41 +83,437 @@ def _unwrap_statement(obj: Any, ticker: str) -> pd.DataFrame:
         df = obj.get(ticker)
         return df if isinstance(df, pd.DataFrame) else pd.DataFrame()
     if isinstance(obj, pd.DataFrame):
+        if isinstance(obj.index, pd.MultiIndex):
+            # multi-ticker Toolkit: rows are (ticker, line item)
+            if ticker in obj.index.get_level_values(0):
+                return obj.xs(ticker, level=0)
+            return pd.DataFrame()
         return obj
     return pd.DataFrame()
 
 
-def _init_toolkit(ticker: str, api_key: Optional[str], inspect: bool) -> Tuple[Toolkit, str]:
+def _split_statement(obj: Any, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """Split a (possibly multi-ticker) FinanceToolkit result into one frame per ticker."""
+    if len(tickers) == 1 and isinstance(obj, pd.DataFrame) and not isinstance(obj.index, pd.MultiIndex):
+        return {tickers[0]: obj}
+    if isinstance(obj, pd.DataFrame) and isinstance(obj.index, pd.MultiIndex):
+        # one pass over the rows; per-ticker xs() would rescan the index for every ticker
+        parts = {t: part.droplevel(0) for t, part in obj.groupby(level=0, sort=False)}
+        return {t: parts.get(t, pd.DataFrame()) for t in tickers}
+    return {t: _unwrap_statement(obj, t) for t in tickers}
+
+
+_FMP = "FinancialModelingPrep"
+_YAHOO = "Yahoo Finance"
+
+
+# statement name (cache key) -> Toolkit method
+_STATEMENT_METHODS: Dict[str, str] = {
+    "income": "get_income_statement",
+    "balance": "get_balance_sheet_statement",
+    "profitability": "get_profitability_ratios",
+    "efficiency": "get_efficiency_ratios",
+    "valuation": "get_valuation_ratios",
+}
+# downloaded as-is; the ratio getters compute from these inside the Toolkit
+_RAW_STATEMENTS = ("income", "balance")
+
+
+_STATEMENT_FLIGHTS = SingleFlight()
+
+# (data source, ticker, raw statement) seen non-empty in this process (download or
+# cache). FinanceToolkit returns HTTP errors as empty tables, so an empty full
+# download for one of these is the provider shedding load, not missing coverage.
+_COVERED: set = set()
+
+
+def _mark_covered(data_source: str, statement: str, frames: Dict[str, pd.DataFrame]) -> None:
+    if statement in _RAW_STATEMENTS:
+        _COVERED.update((data_source, t, statement) for t, df in frames.items() if not df.empty)
+
+
+def _empty_for_covered(data_source: str, statement: str, frames: Dict[str, pd.DataFrame]) -> bool:
+    """Whether a full (non-incremental) download came back empty for a covered ticker."""
+    return any(df.empty and (data_source, t, statement) in _COVERED for t, df in frames.items())
+
+
+def _call_provider(
+    data_source: str,
+    call: Callable[[], Any],
+    suspect_empty: Optional[Callable[[Any], bool]] = None,
+) -> Any:
+    """
+    One provider round trip: token-bucket pacing, then a concurrency slot.
+    Rate-limit errors (429) make the limiter back off; so does a streak of
+    results for which suspect_empty() holds (empty where data is known to exist).
+    """
+    limiter = get_rate_limiter(data_source)
+    # wait for the token before taking a slot, so a backed-off provider holds no slots
+    limiter.acquire()
+    with provider_slot(data_source):
+        try:
+            result = call()
+        except Exception as e:
+            if is_rate_limit_error(e):
+                limiter.report_throttled(retry_after_seconds(e))
+            raise
+    if suspect_empty is not None and suspect_empty(result):
+        limiter.report_empty()
+    else:
+        limiter.report_success()
+    return result
+
+
+def _fetch_statement(
+    tk: Toolkit,
+    data_source: str,
+    ticker: str,
+    statement: str,
+    freq: str = "annual",
+    make_toolkit: Optional[Callable[..., Toolkit]] = None,
+) -> pd.DataFrame:
+    """
+    Read one statement through the on-disk cache (falls back to a direct call if caching is disabled).
+    With a warehouse configured, downloads are persisted there and, given make_toolkit,
+    only periods after the latest stored one are requested for raw statements. Ratio
+    statements are always computed in full by tk: a Toolkit starting at the first new
+    period has no prior period for average-based ratios (ROE, ROIC).
+    """
+    method_name = _STATEMENT_METHODS[statement]
+
+    def fetch() -> pd.DataFrame:
+        warehouse = get_statement_warehouse()
+        start = None
+        if warehouse is not None and make_toolkit is not None and statement in _RAW_STATEMENTS:
+            start = warehouse.next_starts(data_source, [ticker], statement, freq)[ticker]
+        call_tk = tk if start is None else make_toolkit(start_date=start)
+        with span("ft.download", provider=data_source, ticker=ticker, statement=statement, incremental=start is not None):
+            df = _call_provider(
+                data_source,
+                lambda: _unwrap_statement(getattr(call_tk, method_name)(), ticker),
+                # an incremental call with nothing new is legitimately empty
+                lambda df: start is None and _empty_for_covered(data_source, statement, {ticker: df}),
+            )
+        if warehouse is None:
+            return df
+        warehouse.upsert(data_source, ticker, statement, df, freq)
+        return warehouse.load(data_source, ticker, statement, freq)
+
+    def load() -> pd.DataFrame:
+        cache = get_statement_cache()
+        if cache is None:
+            df = fetch()
+        else:
+            df = cache.get_or_fetch(data_source, ticker, statement, fetch, freq=freq)
+        _mark_covered(data_source, statement, {ticker: df})
+        return df
+
+    # concurrent requests for the same statement share one cache read / download;
+    # a forced refresh never joins a call that may be served from the cache
+    with span("ft.statement", provider=data_source, ticker=ticker, statement=statement):
+        return _STATEMENT_FLIGHTS.do((data_source, ticker, statement, freq, force_refresh_active()), load)
+
+
+def _make_toolkit(
+    data_source: str,
+    tickers: List[str],
+    fmp_key: Optional[str] = None,
+    start_date: Optional[str] = None,
+    freq: str = "annual",
+) -> Toolkit:
+    """Toolkit (or recording / replay stand-in) from the active provider, see src/providers.py."""
+    return get_provider().make_toolkit(data_source, list(tickers), fmp_key, start_date, quarterly=freq == "quarterly")
+
+
+def _download_freq(freq: str) -> str:
+    """Statement frequency to download for a metrics freq (TTM is derived from quarters)."""
+    if freq not in FREQS:
+        raise ValueError(f"Unknown freq={freq!r}. Use one of {FREQS}.")
+    return "annual" if freq == "annual" else "quarterly"
+
+
+def _fetch_statement_batch(
+    data_source: str,
+    tickers: List[str],
+    statement: str,
+    fmp_key: Optional[str] = None,
+    freq: str = "annual",
+) -> Dict[str, pd.DataFrame]:
+    """Fetch one statement for many tickers with a single Toolkit call for the cache misses."""
+
+    def fetch_group(group: List[str], start: Optional[str]) -> Dict[str, pd.DataFrame]:
+        tk = _make_toolkit(data_source, group, fmp_key, start_date=start, freq=freq)
+        with span("ft.download", provider=data_source, tickers=len(group), statement=statement, incremental=start is not None):
+            return _call_provider(
+                data_source,
+                lambda: _split_statement(getattr(tk, _STATEMENT_METHODS[statement])(), group),
+                lambda frames: start is None and _empty_for_covered(data_source, statement, frames),
+            )
+
+    def fetch_many(missing: List[str]) -> Dict[str, pd.DataFrame]:
+        warehouse = get_statement_warehouse()
+        if warehouse is None:
+            return fetch_group(missing, None)
+
+        # raw statements: one call per distinct start date, tickers stored up to the
+        # same period share it; ratios are always downloaded in full (see _fetch_statement)
+        by_start: Dict[Optional[str], List[str]] = {}
+        if statement in _RAW_STATEMENTS:
+            for t, start in warehouse.next_starts(data_source, missing, statement, freq).items():
+                by_start.setdefault(start, []).append(t)
+        else:
+            by_start[None] = list(missing)
+        for start, group in by_start.items():
+            for t, df in fetch_group(group, start).items():
+                warehouse.upsert(data_source, t, statement, df, freq)
+        return warehouse.load_many(data_source, missing, statement, freq)
+
+    def load(keys: List[Tuple[str, str, str, str, bool]]) -> Dict[Tuple[str, str, str, str, bool], pd.DataFrame]:
+        pending = [k[1] for k in keys]
+        cache = get_statement_cache()
+        if cache is None:
+            try:
+                frames = fetch_many(pending)
+            except Exception:
+                frames = {t: pd.DataFrame() for t in pending}
+        else:
+            frames = cache.get_or_fetch_many(data_source, pending, statement, fetch_many, freq=freq)
+        _mark_covered(data_source, statement, frames)
+        return {(data_source, t, statement, freq, forced): frames[t] for t in pending}
+
+    # tickers already in flight (single or batch) are joined; one call covers the rest
+    forced = force_refresh_active()
+    keys = [(data_source, t, statement, freq, forced) for t in tickers]
+    with span("ft.statement_batch", provider=data_source, tickers=len(keys), statement=statement):
+        out = _STATEMENT_FLIGHTS.do_many(keys, load, on_error=lambda e: pd.DataFrame())
+    return {k[1]: out[k] for k in keys}
+
+
+@dataclass
+class ResolvedStatements:
+    """
+    Outcome of provider selection: the chosen source plus every statement already
+    downloaded for it. The FMP probe result is kept here, so metric code never
+    requests the same statement twice.
+    """
+    ticker: str
+    data_source: str
+    # None until first needed (batch bundles download through _fetch_statement_batch)
+    toolkit: Optional[Toolkit] = None
+    statements: Dict[str, pd.DataFrame] = field(default_factory=dict)
+    # builds a Toolkit for the same source (the shared one, incremental refresh)
+    make_toolkit: Optional[Callable[..., Toolkit]] = None
+    # download frequency of every statement in the bundle ("annual" | "quarterly")
+    freq: str = "annual"
+    errors: Dict[str, Exception] = field(default_factory=dict)
+    # statement -> cleaned float block, built once and shared by every metric read from it
+    clean: Dict[str, CleanStatement] = field(default_factory=dict, repr=False)
+
+    def shared_toolkit(self) -> Toolkit:
+        """The bundle's Toolkit, built on first use."""
+        if self.toolkit is None:
+            self.toolkit = self.make_toolkit()
+        return self.toolkit
+
+    def get(self, statement: str) -> pd.DataFrame:
+        """Return a statement, downloading it on first use."""
+        if statement in self.errors:
+            raise self.errors[statement]
+        if statement not in self.statements:
+            if statement not in _RAW_STATEMENTS:
+                self._seed_ratio_inputs()
+            self.statements[statement] = self._fetch(statement)
+        return self.statements[statement]
+
+    def _fetch(self, statement: str) -> pd.DataFrame:
+        return _fetch_statement(
+            self.shared_toolkit(), self.data_source, self.ticker, statement, self.freq, make_toolkit=self.make_toolkit
+        )
+
+    def _seed_ratio_inputs(self) -> None:
+        """Load the raw statements (cache / warehouse first) and hand them to the shared Toolkit."""
+        for statement in _RAW_STATEMENTS:
+            if statement not in self.statements and statement not in self.errors:
+                try:
+                    self.statements[statement] = self._fetch(statement)
+                except Exception as e:
+                    self.errors[statement] = e
+        seed_toolkit(self.shared_toolkit(), self.ticker, self.statements, quarterly=self.freq == "quarterly")
+
+    def cleaned(self, statement: str) -> CleanStatement:
+        """Statement as a cleaned float64 block (0.0 placeholders -> NaN), cached per bundle."""
+        if statement not in self.clean:
+            self.clean[statement] = clean_statement(self.get(statement))
+        return self.clean[statement]
+
+    def prefetch(self, statements: Sequence[str]) -> None:
+        """
+        Download the missing statements on the bundle's one Toolkit. The raw
+        statements (which the ratio getters need as well) are fetched
+        concurrently, each filling its own attribute of the Toolkit; the ratio
+        getters then run one after another on that Toolkit, so income, balance
+        and prices are downloaded once. A failure is kept and re-raised by get().
+        """
+        todo = [s for s in dict.fromkeys(statements) if s not in self.statements and s not in self.errors]
+        if not todo:
+            return
+        ratios = [s for s in todo if s not in _RAW_STATEMENTS]
+        raw = [s for s in _RAW_STATEMENTS if s in todo or (ratios and s not in self.statements and s not in self.errors)]
+
+        self.shared_toolkit()  # built before the threads start
+        for statement, (df, err) in run_concurrently({s: partial(self._fetch, s) for s in raw}).items():
+            if err is not None:
+                self.errors[statement] = err
+            else:
+                self.statements[statement] = df
+
+        if ratios:
+            self._seed_ratio_inputs()
+        for statement in ratios:
+            try:
+                self.statements[statement] = self._fetch(statement)
+            except Exception as e:
+                self.errors[statement] = e
+
+    @property
+    def income(self) -> pd.DataFrame:
+        return self.get("income")
+
+    @property
+    def balance(self) -> pd.DataFrame:
+        return self.get("balance")
+
+
+@traced("ft.resolve_provider")
+def _resolve_statements(
+    ticker: str,
+    api_key: Optional[str],
+    inspect: bool,
+    freq: str = "annual",
+) -> ResolvedStatements:
+    """Provider selection for one ticker; freq is the download frequency ("annual" | "quarterly")."""
     ticker = ticker.strip().upper()
     fmp_key = api_key or os.getenv("FMP_API_KEY")
 
-    # Try FMP first
-    if fmp_key:
+    # Try FMP first; the probe doubles as the income statement download.
+    # The breaker skips the probe while FMP keeps coming back empty (e.g. free-tier key).
+    breaker = provider_breaker(_FMP, "income", freq)
+    if fmp_key and not breaker.allow():
+        if inspect:
+            print("[DEBUG] FMP circuit open (recent empty/failed responses). Using Yahoo Finance...")
+    elif fmp_key:
         if inspect:
             print(f"[DEBUG] Attempting FinancialModelingPrep (key length: {len(fmp_key)})")
         try:
-            tk = Toolkit([ticker], api_key=fmp_key, progress_bar=False, quarterly=False, sleep_timer=0.1)
-            test_income = _unwrap_statement(tk.get_income_statement(), ticker)
+            make_toolkit = partial(_make_toolkit, _FMP, [ticker], fmp_key, freq=freq)
+            tk = make_toolkit()
+            test_income = _fetch_statement(tk, _FMP, ticker, "income", freq, make_toolkit=make_toolkit)
             if test_income is not None and not test_income.empty:
+                breaker.record_success()
                 if inspect:
                     print("[SUCCESS] Using FinancialModelingPrep")
-                return tk, "FinancialModelingPrep"
+                return ResolvedStatements(
+                    ticker, _FMP, tk, {"income": test_income}, make_toolkit=make_toolkit, freq=freq
+                )
+            # empty may just mean FMP does not cover this ticker: counted per ticker
+            breaker.record_failure(ticker)
             if inspect:
                 print("[WARN] FMP returned empty. Falling back to Yahoo Finance...")
         except Exception as e:
+            breaker.record_failure()
             if inspect:
                 print(f"[ERROR] FMP failed: {e}. Falling back to Yahoo Finance...")
 
     # Fallback to Yahoo
     if inspect:
         print("[DEBUG] Using Yahoo Finance (free, may rate limit)")
-    tk = Toolkit([ticker], progress_bar=False)
-    return tk, "Yahoo Finance"
+    make_toolkit = partial(_make_toolkit, _YAHOO, [ticker], freq=freq)
+    return ResolvedStatements(ticker, _YAHOO, make_toolkit(), make_toolkit=make_toolkit, freq=freq)
+
+
+@traced("ft.resolve_provider_batch")
+def _resolve_statements_batch(
+    tickers: List[str],
+    api_key: Optional[str],
+    inspect: bool,
+    freq: str = "annual",
+) -> Dict[str, ResolvedStatements]:
+    """
+    Provider selection for a whole universe: one FMP income call for all tickers,
+    then one Yahoo call for those FMP could not serve. The probe income statements
+    are kept in each bundle; a bundle builds its own Toolkit only if a statement
+    is later requested outside the batched path.
+    """
+    fmp_key = api_key or os.getenv("FMP_API_KEY")
+    resolved: Dict[str, ResolvedStatements] = {}
+    remaining = list(tickers)
+
+    breaker = provider_breaker(_FMP, "income", freq)
+    if fmp_key and remaining and breaker.allow():
+        try:
+            income = _fetch_statement_batch(_FMP, remaining, "income", fmp_key, freq)
+        except Exception as e:
+            if inspect:
+                print(f"[ERROR] FMP batch failed: {e}. Falling back to Yahoo Finance...")
+            income = {t: pd.DataFrame() for t in remaining}
+        served = [t for t in remaining if not income[t].empty]
+        # any served ticker means the key works; otherwise every empty ticker counts
+        # once, so a chunk of a few uncovered tickers does not trip the breaker alone
+        if served:
+            breaker.record_success()
+        else:
+            for t in remaining:
+                breaker.record_failure(t)
+        for t in served:
+            resolved[t] = ResolvedStatements(
+                t, _FMP, statements={"income": income[t]},
+                make_toolkit=partial(_make_toolkit, _FMP, [t], fmp_key, freq=freq), freq=freq,
+            )
+        remaining = [t for t in remaining if t not in resolved]
+        if inspect:
+            print(f"[DEBUG] FMP served {len(served)}/{len(tickers)} tickers; {len(remaining)} fall back to Yahoo Finance")
+
+    elif fmp_key and remaining and inspect:
+        print("[DEBUG] FMP circuit open (recent empty/failed responses). Using Yahoo Finance...")
+
+    for t in remaining:
+        resolved[t] = ResolvedStatements(
+            t, _YAHOO, make_toolkit=partial(_make_toolkit, _YAHOO, [t], freq=freq), freq=freq
+        )
+
+    return {t: resolved[t] for t in tickers}
+
+
+def _prefetch_batch(
+    resolved: Dict[str, ResolvedStatements],
+    statements: Sequence[str],
+    fmp_key: Optional[str] = None,
+    freq: str = "annual",
+) -> None:
+    """
+    Download statements for every bundle: one batched call per (data source,
+    statement), with all of those calls running concurrently.
+    """
+    jobs: Dict[Tuple[str, str], Callable[[], Dict[str, pd.DataFrame]]] = {}
+    members: Dict[Tuple[str, str], List[str]] = {}
+    for statement in statements:
+        for t, r in resolved.items():
+            if statement not in r.statements:
+                members.setdefault((r.data_source, statement), []).append(t)
+    for (data_source, statement), tickers in members.items():
+        jobs[(data_source, statement)] = partial(_fetch_statement_batch, data_source, tickers, statement, fmp_key, freq)
+
+    for (data_source, statement), (frames, _err) in run_concurrently(jobs).items():
+        # _fetch_statement_batch degrades to empty frames itself, _err is not expected
+        frames = frames or {}
+        for t in members[(data_source, statement)]:
+            resolved[t].statements[statement] = frames.get(t, pd.DataFrame())
 
 
 # ============================================================
 # 1) TIDY SNAPSHOT API (your original behavior, preserved)
 # ============================================================
+@traced("ft.get_key_metrics_tidy")
 def get_key_metrics_tidy(
     ticker: str,
     mvp_only: bool = True,
@@ -140,19 +525,22 @@ def get_key_metrics_tidy(
     Metric | Value | Period | Unit | Description
     """
     ticker = ticker.strip().upper()
-    tk, data_source = _init_toolkit(ticker, api_key=api_key, inspect=inspect)
+    resolved = _resolve_statements(ticker, api_key=api_key, inspect=inspect)
+    data_source = resolved.data_source
+    # the five downloads are independent: run them concurrently
+    resolved.prefetch(["income", "balance", "profitability", "efficiency", "valuation"])
 
     income = pd.DataFrame()
     balance = pd.DataFrame()
 
     try:
-        income = _unwrap_statement(tk.get_income_statement(), ticker)
+        income = resolved.income
     except Exception as e:
         if inspect:
             print(f"[ERROR] Failed to get income statement: {e}")
 
     try:
-        balance = _unwrap_statement(tk.get_balance_sheet_statement(), ticker)
+        balance = resolved.balance
     except Exception as e:
         if inspect:
             print(f"[ERROR] Failed to get balance sheet: {e}")
@@ -178,26 +566,26 @@ def get_key_metrics_tidy(
     if period is None:
         period = _latest_period_from_columns(balance)
 
-    # helper to read value safely
-    def stmt_value(stmt: pd.DataFrame, row_name: str, col: Any) -> float:
-        if stmt is None or stmt.empty:
-            return np.nan
-        if row_name not in stmt.index:
-            return np.nan
-        if col not in stmt.columns:
-            return np.nan
-        s = _clean_missing(stmt.loc[row_name])
-        return _as_float(s.get(col, np.nan))
+    # each statement is cleaned once; every metric below is a lookup into that block
+    def cleaned(statement: str) -> CleanStatement:
+        try:
+            return resolved.cleaned(statement)
+        except Exception:
+            return clean_statement(None)
+
+    with span("ft.clean_statements"):
+        income_c = cleaned("income")
+        balance_c = cleaned("balance")
 
     # MVP computed metrics
-    revenue = stmt_value(income, "Revenue", period) if period is not None else np.nan
-    gross_profit = stmt_value(income, "Gross Profit", period) if period is not None else np.nan
+    revenue = income_c.value("Revenue", period) if period is not None else np.nan
+    gross_profit = income_c.value("Gross Profit", period) if period is not None else np.nan
     gross_margin = (gross_profit / revenue) if (not np.isnan(revenue) and revenue != 0) else np.nan
 
-    total_assets = stmt_value(balance, "Total Assets", period) if period is not None else np.nan
-    total_liab = stmt_value(balance, "Total Liabilities", period) if period is not None else np.nan
+    total_assets = balance_c.value("Total Assets", period) if period is not None else np.nan
+    total_liab = balance_c.value("Total Liabilities", period) if period is not None else np.nan
     if np.isnan(total_liab):
-        total_liab = stmt_value(balance, "Total Liabilities Net Minority Interest", period) if period is not None else np.nan
+        total_liab = balance_c.value("Total Liabilities Net Minority Interest", period) if period is not None else np.nan
     debt_ratio = (total_liab / total_assets) if (not np.isnan(total_assets) and total_assets != 0) else np.nan
 
     # Optional ratios (best-effort)
@@ -206,34 +594,37 @@ def get_key_metrics_tidy(
     pe = np.nan
 
     try:
-        prof = _unwrap_statement(tk.get_profitability_ratios(), ticker)
+        prof = resolved.get("profitability")
         if prof is not None and not prof.empty:
             p = _latest_period_from_columns(prof) or period
-            if "Return on Equity" in prof.index:
-                roe = _as_float(_clean_missing(prof.loc["Return on Equity"]).get(p, np.nan))
-            elif "ROE" in prof.index:
-                roe = _as_float(_clean_missing(prof.loc["ROE"]).get(p, np.nan))
+            prof_c = resolved.cleaned("profitability")
+            if "Return on Equity" in prof_c:
+                roe = prof_c.value("Return on Equity", p)
+            elif "ROE" in prof_c:
+                roe = prof_c.value("ROE", p)
     except Exception:
         pass
 
     try:
-        eff = _unwrap_statement(tk.get_efficiency_ratios(), ticker)
+        eff = resolved.get("efficiency")
         if eff is not None and not eff.empty:
             p = _latest_period_from_columns(eff) or period
-            if "Return on Invested Capital" in eff.index:
-                roic = _as_float(_clean_missing(eff.loc["Return on Invested Capital"]).get(p, np.nan))
-            elif "ROIC" in eff.index:
-                roic = _as_float(_clean_missing(eff.loc["ROIC"]).get(p, np.nan))
+            eff_c = resolved.cleaned("efficiency")
+            if "Return on Invested Capital" in eff_c:
+                roic = eff_c.value("Return on Invested Capital", p)
+            elif "ROIC" in eff_c:
+                roic = eff_c.value("ROIC", p)
     except Exception:
         pass
 
     try:
-        val = _unwrap_statement(tk.get_valuation_ratios(), ticker)
+        val = resolved.get("valuation")
         if val is not None and not val.empty:
             p = _latest_period_from_columns(val) or period
+            val_c = resolved.cleaned("valuation")
             for candidate in ["Price Earnings Ratio", "P/E", "PE Ratio", "Price to Earnings"]:
-                if candidate in val.index:
-                    pe = _as_float(_clean_missing(val.loc[candidate]).get(p, np.nan))
+                if candidate in val_c:
+                    pe = val_c.value(candidate, p)
                     break
     except Exception:
         pass
@@ -279,86 +670,133 @@ def get_key_metrics_tidy(
 # ============================================================
 # 2) TIMESERIES API (for line charts)
 # ============================================================
-def _norm(s: str) -> str:
-    return str(s).strip().lower()
+DEFAULT_SCHEMA_PATH = Path(__file__).resolve().parents[1] / "config" / "indicators.yaml"
 
 
-def _find_row_key(df: pd.DataFrame, candidates: List[str]) -> Optional[str]:
-    """Find best matching row name in df.index (case-insensitive)."""
-    if df is None or df.empty:
-        return None
-
-    idx = [str(x) for x in df.index]
-    idx_norm = [_norm(x) for x in idx]
-    cand_norm = [_norm(c) for c in candidates]
+@lru_cache(maxsize=1)
+def _default_schema() -> Schema:
+    return load_schema(DEFAULT_SCHEMA_PATH)
 
-    # exact
-    for c in cand_norm:
-        for i, v in enumerate(idx_norm):
-            if v == c:
-                return idx[i]
 
-    # contains fallback
-    for c in cand_norm:
-        for i, v in enumerate(idx_norm):
-            if c in v:
-                return idx[i]
+def _schema_formulas(schema: Optional[Schema]) -> FormulaSet:
+    """Compiled indicator formulas (config/indicators.yaml unless a schema is given)."""
+    schema = schema if schema is not None else _default_schema()
+    if schema.formulas is None:
+        raise ValueError(f"Schema {schema.version} has no compiled formulas.")
+    return schema.formulas
 
-    return None
 
+def _schema_freq(schema: Optional[Schema], freq: Optional[str]) -> str:
+    """
+    Metrics frequency: an explicit freq wins, otherwise the `data_freq` shared by the
+    schema's formula indicators. Indicators with different data_freq cannot share one
+    index, so a mixed schema needs an explicit freq.
+    """
+    if freq is not None:
+        freq = str(freq).lower().strip()
+        _download_freq(freq)
+        return freq
+    schema = schema if schema is not None else _default_schema()
+    keys = schema.formulas.keys if schema.formulas is not None else list(schema.indicators)
+    freqs = sorted({schema.indicators[k].data_freq for k in keys if k in schema.indicators})
+    if len(freqs) > 1:
+        raise ValueError(f"Indicators use different data_freq {freqs}; pass freq= explicitly.")
+    freq = freqs[0] if freqs else "annual"
+    _download_freq(freq)
+    return freq
+
+
+def source_identity(
+    api_key: Optional[str] = None,
+    schema: Optional[Schema] = None,
+    freq: Optional[str] = None,
+) -> Tuple[str, str, str]:
+    """
+    (provider mode, data source a request would resolve to, FMP key fingerprint),
+    for keying caches of computed metrics. Same resolution rule as
+    _resolve_statements: FMP when a key is set and its breaker is not open,
+    otherwise Yahoo. A per-ticker fallback after an empty FMP probe is not
+    visible here.
+    """
+    fmp_key = api_key or os.getenv("FMP_API_KEY")
+    download_freq = _download_freq(_schema_freq(schema, freq))
+    if fmp_key and not provider_breaker(_FMP, "income", download_freq).is_open():
+        data_source = _FMP
+    else:
+        data_source = _YAHOO
+    fingerprint = hashlib.sha256(fmp_key.encode("utf-8")).hexdigest()[:12] if fmp_key else ""
+    return get_provider().name, data_source, fingerprint
 
-def _periods_to_year_index(cols: pd.Index) -> List[str]:
-    years: List[str] = []
-    for col in cols:
-        s = str(col)
-        if len(s) >= 4 and s[:4].isdigit():
-            years.append(s[:4])
-        else:
-            years.append(s)
-    return years
 
+def _compute_timeseries(
+    income: pd.DataFrame,
+    balance: pd.DataFrame,
+    formulas: FormulaSet,
+    data_source: str = "",
+    freq: str = "annual",
+) -> pd.DataFrame:
+    """Compute the schema indicators from one ticker's income statement and balance sheet."""
+    panel = compute_metrics_panel({"_": {"income": income, "balance": balance}}, formulas, {"_": data_source}, freq)
+    if panel.empty:
+        return panel
+    return panel.droplevel("ticker")
 
-def _series_by_row(df: pd.DataFrame, row_key: Optional[str]) -> pd.Series:
-    """Extract numeric series from a statement row, indexed by year string."""
-    if df is None or df.empty or row_key is None or row_key not in df.index:
-        return pd.Series(dtype=float)
 
-    s = _clean_missing(df.loc[row_key])
-    s.index = _periods_to_year_index(s.index)
-    s = s[~pd.Index(s.index).duplicated(keep="last")]
-    s = pd.to_numeric(s, errors="coerce")
-    try:
-        s = s.sort_index()
-    except Exception:
-        pass
-    return s
+@traced("ft.trim_periods")
+def _trim_periods(df: pd.DataFrame, periods: str) -> pd.DataFrame:
+    p = str(periods).lower().strip()
+    if p not in ("all", ""):
+        if p in ("latest", "last", "1"):
+            df = df.tail(1)
+        else:
+            try:
+                n = int(periods)
+                df = df.tail(n)
+            except Exception:
+                pass
+    return df
 
 
-def _safe_divide_series(a: pd.Series, b: pd.Series) -> pd.Series:
-    a = pd.to_numeric(a, errors="coerce")
-    b = pd.to_numeric(b, errors="coerce")
-    out = a / b
-    out = out.replace([np.inf, -np.inf], np.nan)
-    return out
+@traced("ft.trim_periods")
+def _trim_periods_panel(panel: pd.DataFrame, periods: str) -> pd.DataFrame:
+    """_trim_periods applied per ticker of a (ticker, period) frame."""
+    p = str(periods).lower().strip()
+    if p in ("all", ""):
+        return panel
+    n = 1 if p in ("latest", "last") else None
+    if n is None:
+        try:
+            n = int(periods)
+        except Exception:
+            return panel
+    return panel.groupby(level="ticker", sort=False).tail(n)
 
 
+@traced("ft.get_key_metrics_timeseries")
 def get_key_metrics_timeseries(
     ticker: str,
     periods: str = "all",
     inspect: bool = False,
     api_key: Optional[str] = None,
+    schema: Optional[Schema] = None,
+    freq: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Return time series metrics:
-      index = year (string)
-      columns = indicator_key:
+      index = year (string) for freq="annual",
+              quarterly PeriodIndex for freq="quarterly" / "ttm" (trailing 4 quarters)
+      columns = indicator_key, computed from the schema `formula` fields:
         gross_margin, operating_margin, roe, debt_ratio, current_ratio
+    freq defaults to the schema's `data_freq`.
     """
     ticker = ticker.strip().upper()
-    tk, data_source = _init_toolkit(ticker, api_key=api_key, inspect=inspect)
+    freq = _schema_freq(schema, freq)
+    resolved = _resolve_statements(ticker, api_key=api_key, inspect=inspect, freq=_download_freq(freq))
+    data_source = resolved.data_source
+    resolved.prefetch(["income", "balance"])
 
-    income = _unwrap_statement(tk.get_income_statement(), ticker)
-    balance = _unwrap_statement(tk.get_balance_sheet_statement(), ticker)
+    income = resolved.income
+    balance = resolved.balance
 
     if inspect:
         print("\n========== TIMESERIES INSPECT ==========")
@@ -371,90 +809,69 @@ def get_key_metrics_timeseries(
         print("BALANCE columns sample:", list(balance.columns)[:10])
         print("=======================================\n")
 
-    # robust row matching
-    k_revenue = _find_row_key(income, ["Revenue", "Total Revenue", "Net Revenue", "Revenues"])
-    k_gross_profit = _find_row_key(income, ["Gross Profit", "GrossProfit"])
-    k_operating_income = _find_row_key(income, ["Operating Income", "Income From Operations", "OperatingIncome"])
-    k_net_income = _find_row_key(income, ["Net Income", "NetIncome", "Net Income Common Stockholders"])
-
-    k_total_assets = _find_row_key(balance, ["Total Assets", "TotalAssets"])
-    k_total_liab = _find_row_key(balance, ["Total Liabilities", "Total Liabilities Net Minority Interest", "TotalLiabilities"])
-    k_current_assets = _find_row_key(balance, ["Total Current Assets", "Current Assets", "TotalCurrentAssets"])
-    k_current_liab = _find_row_key(balance, ["Total Current Liabilities", "Current Liabilities", "TotalCurrentLiabilities"])
-    k_total_equity = _find_row_key(balance, ["Total Stockholders Equity", "Total Equity", "Total Shareholders Equity"])
-
-    revenue = _series_by_row(income, k_revenue)
-    gross_profit = _series_by_row(income, k_gross_profit)
-    operating_income = _series_by_row(income, k_operating_income)
-    net_income = _series_by_row(income, k_net_income)
-
-    total_assets = _series_by_row(balance, k_total_assets)
-    total_liab = _series_by_row(balance, k_total_liab)
-    current_assets = _series_by_row(balance, k_current_assets)
-    current_liab = _series_by_row(balance, k_current_liab)
-    total_equity = _series_by_row(balance, k_total_equity)
-
-    # union years
-    all_years = sorted(
-        set(revenue.index)
-        | set(gross_profit.index)
-        | set(operating_income.index)
-        | set(net_income.index)
-        | set(total_assets.index)
-        | set(total_liab.index)
-        | set(current_assets.index)
-        | set(current_liab.index)
-        | set(total_equity.index)
-    )
+    df = _compute_timeseries(income, balance, _schema_formulas(schema), data_source, freq)
+    if df.empty:
+        return df
+    return _trim_periods(df, periods)
 
-    if not all_years:
-        return pd.DataFrame()
 
-    def r(s: pd.Series) -> pd.Series:
-        return s.reindex(all_years)
-
-    revenue = r(revenue)
-    gross_profit = r(gross_profit)
-    operating_income = r(operating_income)
-    net_income = r(net_income)
-
-    total_assets = r(total_assets)
-    total_liab = r(total_liab)
-    current_assets = r(current_assets)
-    current_liab = r(current_liab)
-    total_equity = r(total_equity)
-
-    # IMPORTANT: keep as decimals for plotting; formatting later if needed
-    gross_margin = _safe_divide_series(gross_profit, revenue)
-    operating_margin = _safe_divide_series(operating_income, revenue)
-    roe = _safe_divide_series(net_income, total_equity)
-    debt_ratio = _safe_divide_series(total_liab, total_assets)
-    current_ratio = _safe_divide_series(current_assets, current_liab)
-
-    df = pd.DataFrame(
-        {
-            "gross_margin": gross_margin,
-            "operating_margin": operating_margin,
-            "roe": roe,
-            "debt_ratio": debt_ratio,
-            "current_ratio": current_ratio,
-        },
-        index=pd.Index(all_years, name="year"),
-    )
+@traced("ft.get_key_metrics_panel")
+def get_key_metrics_panel(
+    tickers: Sequence[str],
+    periods: str = "all",
+    inspect: bool = False,
+    api_key: Optional[str] = None,
+    chunk_size: int = 200,
+    schema: Optional[Schema] = None,
+    offline: bool = False,
+    freq: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Batch version of get_key_metrics_timeseries for a whole universe.
 
-    # periods handling
-    p = str(periods).lower().strip()
-    if p not in ("all", ""):
-        if p in ("latest", "last", "1"):
-            df = df.tail(1)
-        else:
-            try:
-                n = int(periods)
-                df = df.tail(n)
-            except Exception:
-                pass
+    Tickers are fetched in chunks of `chunk_size` with one multi-ticker Toolkit
+    call per (chunk, data source, statement) instead of one Toolkit per ticker.
+    offline=True reads every statement from the local warehouse in one scan instead.
 
-    return df
+    Returns:
+      index = MultiIndex (ticker, year), or (ticker, period) for quarterly / ttm
+      columns = indicator keys, same as get_key_metrics_timeseries
+    Tickers without data are left out.
+    """
+    universe = list(dict.fromkeys(t.strip().upper() for t in tickers if t and t.strip()))
+    formulas = _schema_formulas(schema)
+    freq = _schema_freq(schema, freq)
+    download_freq = _download_freq(freq)
+    fmp_key = api_key or os.getenv("FMP_API_KEY")
+
+    step = max(1, int(chunk_size))
+    statements: Dict[str, Dict[str, pd.DataFrame]] = {}
+    sources: Dict[str, str] = {}
+    if offline:
+        warehouse = get_statement_warehouse()
+        if warehouse is None:
+            raise ValueError("offline=True needs a statement warehouse (set FT_WAREHOUSE_PATH)")
+        statements, sources = warehouse.scan(["income", "balance"], universe, freq=download_freq)
+    else:
+        for start in range(0, len(universe), step):
+            chunk = universe[start:start + step]
+            resolved = _resolve_statements_batch(chunk, api_key=api_key, inspect=inspect, freq=download_freq)
+            # FMP bundles already hold the probe income; Yahoo ones get it here
+            _prefetch_batch(resolved, ["income", "balance"], fmp_key, download_freq)
+            for t, r in resolved.items():
+                statements[t] = {"income": r.income, "balance": r.balance}
+                sources[t] = r.data_source
+
+    # one vectorized pass over the whole universe
+    panel = compute_metrics_panel(statements, formulas, sources, freq)
+
+    if inspect:
+        n_with_data = panel.index.get_level_values("ticker").nunique() if not panel.empty else 0
+        print(f"[DEBUG] panel: {n_with_data}/{len(universe)} tickers with data")
+
+    if panel.empty:
+        return panel
+    return _trim_periods_panel(panel, periods)
 
 
 # ============================================================
@@ -468,19 +885,49 @@ def get_key_metrics(
     mvp_only: bool = True,
     inspect: bool = False,
     api_key: Optional[str] = None,
+    freq: Optional[str] = None,
 ) -> pd.DataFrame:
     """
     Unified API.
 
     output="timeseries":
       index=year, columns=indicator_key (gross_margin, operating_margin, roe, debt_ratio, current_ratio)
+      freq="annual" | "quarterly" | "ttm" (default: schema data_freq)
 
     output="tidy":
       your original snapshot table (Metric/Value/Period/Unit/Description)
     """
     mode = str(output).lower().strip()
     if mode in ("timeseries", "ts", "series"):
-        return get_key_metrics_timeseries(ticker, periods=periods, inspect=inspect, api_key=api_key)
+        return get_key_metrics_timeseries(ticker, periods=periods, inspect=inspect, api_key=api_key, freq=freq)
     if mode in ("tidy", "snapshot"):
         return get_key_metrics_tidy(ticker, mvp_only=mvp_only, inspect=inspect, api_key=api_key)
     raise ValueError(f"Unknown output={output}. Use 'timeseries' or 'tidy'.")
+
+
+async def aget_key_metrics(
+    ticker: str,
+    *,
+    output: str = "timeseries",
+    periods: str = "all",
+    mvp_only: bool = True,
+    inspect: bool = False,
+    api_key: Optional[str] = None,
+    freq: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Async variant of get_key_metrics for event-loop servers.
+
+    Runs off the event loop; the statement downloads inside run concurrently
+    under the limits in src/concurrency.py.
+    """
+    return await asyncio.to_thread(
+        get_key_metrics,
+        ticker,
+        output=output,
+        periods=periods,
+        mvp_only=mvp_only,
+        inspect=inspect,
+        api_key=api_key,
+        freq=freq,
+    )
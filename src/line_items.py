@@ -0,0 +1,120 @@
+"""
+Line-item resolver: canonical line item (e.g. "revenue") -> statement row label.
+
+Replaces the per-call O(rows x candidates) scan of _find_row_key:
+- aliases are normalized once per provider schema
+- exact matches are dict lookups on a normalized row -> position map
+- the "contains" fallback uses one prebuilt haystack string per index, so each
+  alias is a single str.find instead of a loop over rows
+- results are memoized per (provider, index fingerprint); statements with the
+  same row layout (typical across tickers of one provider) resolve once
+"""
+
+from __future__ import annotations
+
+import threading
+from bisect import bisect_right
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+
+def _norm(s: str) -> str:
+    return str(s).strip().lower()
+
+
+class _IndexLookup:
+    """Prebuilt lookups over one statement index."""
+
+    def __init__(self, labels: Sequence[str]) -> None:
+        self.labels = list(labels)
+        norm = [_norm(x) for x in self.labels]
+
+        self.exact: Dict[str, int] = {}
+        for pos, v in enumerate(norm):
+            self.exact.setdefault(v, pos)
+
+        # rows are "\n"-separated and aliases never contain "\n", so a hit cannot span two rows
+        self.haystack = "\n".join(v.replace("\n", " ") for v in norm)
+        self.starts: List[int] = []
+        offset = 0
+        for v in norm:
+            self.starts.append(offset)
+            offset += len(v) + 1
+
+    def contains(self, alias: str) -> Optional[int]:
+        """Position of the first row whose normalized label contains alias."""
+        hit = self.haystack.find(alias)
+        if hit < 0:
+            return None
+        return bisect_right(self.starts, hit) - 1
+
+
+def _fingerprint(labels: Sequence[str]) -> Tuple[int, int]:
+    return len(labels), hash(tuple(labels))
+
+
+class LineItemResolver:
+    """
+    Resolver for one provider schema. Memo: index fingerprint -> {item: row label};
+    one resolver per provider (get_resolver) gives the (provider, fingerprint) key.
+    """
+
+    def __init__(self, aliases: Mapping[str, Sequence[str]], *, max_memo: int = 4096) -> None:
+        self.aliases: Dict[str, List[str]] = {item: [_norm(a) for a in names] for item, names in aliases.items()}
+        self.max_memo = max_memo
+        self._memo: "OrderedDict[Tuple[int, int], Dict[str, Optional[str]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def resolve(self, index: Iterable, items: Sequence[str]) -> Dict[str, Optional[str]]:
+        """Map each requested line item to a row label of `index` (None if absent)."""
+        labels = [str(x) for x in index]
+        key = _fingerprint(labels)
+
+        with self._lock:
+            known = self._memo.get(key)
+            if known is not None:
+                self._memo.move_to_end(key)
+                if all(i in known for i in items):
+                    return {i: known[i] for i in items}
+
+        lookup = _IndexLookup(labels)
+        resolved = {i: self._resolve_one(lookup, i) for i in items}
+
+        with self._lock:
+            entry = self._memo.setdefault(key, {})
+            entry.update(resolved)
+            self._memo.move_to_end(key)
+            while len(self._memo) > self.max_memo:
+                self._memo.popitem(last=False)
+        return resolved
+
+    def _resolve_one(self, lookup: _IndexLookup, item: str) -> Optional[str]:
+        candidates = self.aliases.get(item, [])
+        # exact
+        for c in candidates:
+            pos = lookup.exact.get(c)
+            if pos is not None:
+                return lookup.labels[pos]
+        # contains fallback
+        for c in candidates:
+            pos = lookup.contains(c)
+            if pos is not None:
+                return lookup.labels[pos]
+        return None
+
+
+# -----------------------------
+# per-provider resolvers
+# -----------------------------
+_RESOLVERS: Dict[str, LineItemResolver] = {}
+_RESOLVERS_LOCK = threading.Lock()
+
+
+def get_resolver(provider: str, aliases: Mapping[str, Sequence[str]]) -> LineItemResolver:
+    """Process-wide resolver for a provider; the alias dictionary is normalized once."""
+    with _RESOLVERS_LOCK:
+        resolver = _RESOLVERS.get(provider)
+        if resolver is None:
+            resolver = LineItemResolver(aliases)
+            _RESOLVERS[provider] = resolver
+        return resolver
@@ -0,0 +1,205 @@
+"""
+On-disk response cache for call_llm.
+
+A DeepSeek answer is a pure function of (model, temperature, system prompt,
+user prompt) as far as the app is concerned, so repeated explanations of the
+same chart are served from disk instead of paying for another completion.
+Entries are small JSON files addressed by a sha256 fingerprint of that tuple.
+
+- TTL (default 7 days) so answers eventually pick up model updates
+- size-bounded LRU eviction (max_bytes)
+- hit / miss / eviction counters (stats)
+- same storage pattern as statement_cache: no shared index, each entry file
+  carries its own metadata, recency is the file's mtime (os.utime on a hit),
+  and files are read and written outside the lock, so processes can share
+  the directory
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+DEFAULT_TTL_SECONDS = 7 * 24 * 60 * 60
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "llm"
+
+_LEGACY_INDEX_FILE = "index.json"
+
+
+@dataclass
+class LLMCacheEntry:
+    last_access: float
+    size: int
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+
+def prompt_fingerprint(model: str, temperature: float, system_prompt: str, prompt: str) -> str:
+    """sha256 of the request fields that determine the answer."""
+    raw = json.dumps([model, round(float(temperature), 6), system_prompt, prompt], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_CACHE_DIR,
+        *,
+        ttl_seconds: float = DEFAULT_TTL_SECONDS,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+    ) -> None:
+        self.root = Path(root)
+        self.ttl_seconds = float(ttl_seconds)
+        self.max_bytes = int(max_bytes)
+        self.stats = LLMCacheStats()
+
+        self._lock = threading.Lock()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._entries: Dict[str, LLMCacheEntry] = self._load_entries()
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMResponseCache"]:
+        """Build the default cache from LLM_CACHE_* env vars (None when disabled)."""
+        if os.getenv("LLM_CACHE_DISABLED", "").strip().lower() in ("1", "true", "yes"):
+            return None
+        root = os.getenv("LLM_CACHE_DIR") or DEFAULT_CACHE_DIR
+        ttl = float(os.getenv("LLM_CACHE_TTL", DEFAULT_TTL_SECONDS))
+        max_mb = os.getenv("LLM_CACHE_MAX_MB")
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        return cls(root, ttl_seconds=ttl, max_bytes=max_bytes)
+
+    # -----------------------------
+    # entry files
+    # -----------------------------
+    def _path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _load_entries(self) -> Dict[str, LLMCacheEntry]:
+        # older versions kept a shared index; the entry files are all that is needed
+        (self.root / _LEGACY_INDEX_FILE).unlink(missing_ok=True)
+        entries: Dict[str, LLMCacheEntry] = {}
+        for path in self.root.glob("*.json"):
+            try:
+                st = path.stat()
+            except OSError:
+                continue
+            entries[path.stem] = LLMCacheEntry(last_access=st.st_mtime, size=st.st_size)
+        return entries
+
+    # -----------------------------
+    # read / write
+    # -----------------------------
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer for a fingerprint, or None (counts a hit or a miss)."""
+        path = self._path(key)
+        # read outside the lock: concurrent lookups (analyze_all_groups) do not queue on disk
+        try:
+            raw = path.read_bytes()
+            data = json.loads(raw.decode("utf-8"))
+            content = data["content"]
+            # files written before created_at was stored count as expired
+            created_at = float(data.get("created_at", 0.0))
+        except FileNotFoundError:
+            data = None
+        except Exception:
+            # unreadable entry: drop it instead of missing on it forever
+            data = None
+            path.unlink(missing_ok=True)
+
+        now = time.time()
+        expired = data is not None and now - created_at >= self.ttl_seconds
+        if expired:
+            path.unlink(missing_ok=True)
+        with self._lock:
+            if data is None or expired:
+                self._entries.pop(key, None)
+                self.stats.expired += int(expired)
+                self.stats.misses += 1
+                return None
+            self._entries[key] = LLMCacheEntry(last_access=now, size=len(raw))
+            self.stats.hits += 1
+        try:
+            os.utime(path, (now, now))
+        except OSError:
+            pass
+        return content
+
+    def put(self, key: str, content: str, model: str = "") -> None:
+        path = self._path(key)
+        now = time.time()
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(
+            json.dumps({"model": model, "created_at": now, "content": content}, ensure_ascii=False), encoding="utf-8"
+        )
+        os.replace(tmp, path)
+        size = path.stat().st_size
+
+        with self._lock:
+            self._entries[key] = LLMCacheEntry(last_access=now, size=size)
+            evicted = self._evict()
+        for victim in evicted:
+            self._path(victim).unlink(missing_ok=True)
+
+    def _evict(self) -> List[str]:
+        """Drop least-recently-used entries until the cache fits in max_bytes; returns their keys."""
+        total = sum(e.size for e in self._entries.values())
+        if total <= self.max_bytes:
+            return []
+        evicted = []
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1].last_access):
+            if total <= self.max_bytes:
+                break
+            total -= entry.size
+            del self._entries[key]
+            evicted.append(key)
+            self.stats.evictions += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        for path in self.root.glob("*.json"):
+            path.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+# -----------------------------
+# process-wide default cache
+# -----------------------------
+_DEFAULT_CACHE: Optional[LLMResponseCache] = None
+_DEFAULT_CACHE_READY = False
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_llm_cache() -> Optional[LLMResponseCache]:
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_READY
+    with _DEFAULT_CACHE_LOCK:
+        if not _DEFAULT_CACHE_READY:
+            _DEFAULT_CACHE = LLMResponseCache.from_env()
+            _DEFAULT_CACHE_READY = True
+        return _DEFAULT_CACHE
+
+
+def set_llm_cache(cache: Optional[LLMResponseCache]) -> None:
+    """Replace the process-wide cache (pass None to disable caching)."""
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_READY
+    with _DEFAULT_CACHE_LOCK:
+        _DEFAULT_CACHE = cache
+        _DEFAULT_CACHE_READY = True
@@ -0,0 +1,300 @@
+"""
+Vectorized metric engine.
+
+All statement rows referenced by the schema formulas are aligned into one
+dense block (ticker x line item x period) and every indicator is computed in
+a single NumPy pass over that block. Single-ticker and panel requests go
+through the same code path (N = 1 vs N = universe size).
+
+Frequencies:
+- annual:    periods are year strings ("2023")
+- quarterly: periods are quarters on a gap-free axis, output as a Period index
+- ttm:       quarterly block where flow items (income statement) are replaced by
+             their rolling 4-quarter sum; stock items (balance sheet) keep the
+             quarter-end value
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .formula import FormulaError, FormulaSet
+from .line_items import LineItemResolver, get_resolver
+from .tracing import span
+
+
+@dataclass(frozen=True)
+class LineItem:
+    key: str
+    statement: str
+    aliases: Tuple[str, ...]
+
+
+# line item -> statement + candidate row names (first match wins)
+LINE_ITEMS: Dict[str, LineItem] = {
+    item.key: item
+    for item in [
+        LineItem("revenue", "income", ("Revenue", "Total Revenue", "Net Revenue", "Revenues")),
+        LineItem("gross_profit", "income", ("Gross Profit", "GrossProfit")),
+        LineItem("operating_income", "income", ("Operating Income", "Income From Operations", "OperatingIncome")),
+        LineItem("net_income", "income", ("Net Income", "NetIncome", "Net Income Common Stockholders")),
+        LineItem("total_assets", "balance", ("Total Assets", "TotalAssets")),
+        LineItem("total_liabilities", "balance", ("Total Liabilities", "Total Liabilities Net Minority Interest", "TotalLiabilities")),
+        LineItem("current_assets", "balance", ("Total Current Assets", "Current Assets", "TotalCurrentAssets")),
+        LineItem("current_liabilities", "balance", ("Total Current Liabilities", "Current Liabilities", "TotalCurrentLiabilities")),
+        LineItem("total_equity", "balance", ("Total Stockholders Equity", "Total Equity", "Total Shareholders Equity")),
+    ]
+}
+
+
+FREQS = ("annual", "quarterly", "ttm")
+# statements whose line items are flows over the period (summed for TTM)
+FLOW_STATEMENTS = {"income"}
+TTM_QUARTERS = 4
+
+
+@dataclass(frozen=True)
+class StatementBlock:
+    tickers: List[str]
+    items: List[str]
+    periods: List[str]
+    values: np.ndarray   # (ticker, item, period) float64, NaN = missing
+    present: np.ndarray  # (ticker, period) bool, period reported by any used statement
+
+    def item(self, key: str) -> np.ndarray:
+        """(ticker, period) slice for one line item."""
+        return self.values[:, self.items.index(key), :]
+
+
+def resolver_for(provider: str = "") -> LineItemResolver:
+    """Shared resolver for a provider's statement layout, built from LINE_ITEMS."""
+    return get_resolver(provider, {k: item.aliases for k, item in LINE_ITEMS.items()})
+
+
+def _periods_to_year_index(cols: pd.Index) -> List[str]:
+    years: List[str] = []
+    for col in cols:
+        s = str(col)
+        if len(s) >= 4 and s[:4].isdigit():
+            years.append(s[:4])
+        else:
+            years.append(s)
+    return years
+
+
+def _quarter_label(col: Any) -> Optional[str]:
+    try:
+        period = col.asfreq("Q") if isinstance(col, pd.Period) else pd.Period(str(col), freq="Q")
+    except (ValueError, TypeError):
+        return None
+    return str(period)
+
+
+def _period_labels(cols: pd.Index, freq: str) -> List[Optional[str]]:
+    """Column labels -> block period labels (None = column not usable at this freq)."""
+    if freq == "annual":
+        return list(_periods_to_year_index(cols))
+    return [_quarter_label(c) for c in cols]
+
+
+def _rows_to_float(df: pd.DataFrame) -> np.ndarray:
+    try:
+        return df.to_numpy(dtype=np.float64, na_value=np.nan)
+    except (TypeError, ValueError):
+        return df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+
+
+def _clean_rows(values: np.ndarray) -> np.ndarray:
+    """
+    Row-wise version of the 0.0-placeholder rule: zeros become NaN in rows that
+    also hold a non-zero value; all-zero rows are kept as they are.
+    """
+    out = values.copy()
+    nonzero = ~np.isnan(out) & (out != 0)
+    mask = nonzero.any(axis=1)[:, None] & (out == 0)
+    out[mask] = np.nan
+    return out
+
+
+@dataclass(frozen=True)
+class CleanStatement:
+    """One statement converted to a cleaned float64 block, with O(1) row / column lookup."""
+    values: np.ndarray   # (row, period), 0.0 placeholders already NaN
+    rows: Dict[Any, int]
+    cols: Dict[Any, int]
+
+    def __contains__(self, row: Any) -> bool:
+        return row in self.rows
+
+    def value(self, row: Any, col: Any) -> float:
+        r = self.rows.get(row)
+        c = self.cols.get(col)
+        if r is None or c is None:
+            return np.nan
+        return float(self.values[r, c])
+
+
+def clean_statement(df: Optional[pd.DataFrame]) -> CleanStatement:
+    """
+    Whole-frame version of the missing-value cleaning: one float64 conversion and
+    the row-wise 0.0-placeholder rule (_clean_rows) as NumPy masks.
+    Duplicate labels resolve to their first occurrence.
+    """
+    if df is None or df.empty:
+        return CleanStatement(np.empty((0, 0)), {}, {})
+    rows: Dict[Any, int] = {}
+    for pos, label in enumerate(df.index):
+        rows.setdefault(label, pos)
+    cols: Dict[Any, int] = {}
+    for pos, label in enumerate(df.columns):
+        cols.setdefault(label, pos)
+    return CleanStatement(_clean_rows(_rows_to_float(df)), rows, cols)
+
+
+def build_block(
+    frames: Dict[str, Dict[str, pd.DataFrame]],
+    items: Sequence[str],
+    sources: Optional[Dict[str, str]] = None,
+    freq: str = "annual",
+) -> StatementBlock:
+    """
+    Align the requested line items of every ticker into one (T, I, P) array.
+
+    frames: ticker -> statement name -> raw statement frame
+    sources: ticker -> data source, picks the resolver (and its memo) per provider
+    Period columns are collapsed to years, or quarters for quarterly / ttm
+    (last duplicate wins).
+    """
+    sources = sources or {}
+    tickers = list(frames)
+    items = list(items)
+    by_statement: Dict[str, List[int]] = {}
+    for i, key in enumerate(items):
+        by_statement.setdefault(LINE_ITEMS[key].statement, []).append(i)
+
+    # pass 1a: per (ticker, statement) map the needed line items to row positions
+    located: List[Tuple[int, List[int], List[int], pd.DataFrame]] = []
+    with span("ft.resolve_rows", tickers=len(tickers)):
+        for t, ticker in enumerate(tickers):
+            stmts = frames[ticker]
+            resolver = resolver_for(sources.get(ticker, ""))
+            for statement, item_idx in by_statement.items():
+                df = stmts.get(statement)
+                if df is None or df.empty:
+                    continue
+
+                first_pos: Dict[str, int] = {}
+                for pos, label in enumerate(df.index):
+                    first_pos.setdefault(str(label), pos)
+
+                row_keys = resolver.resolve(df.index, [items[i] for i in item_idx])
+                found_items: List[int] = []
+                row_pos: List[int] = []
+                for i in item_idx:
+                    key = row_keys[items[i]]
+                    if key is not None and key in first_pos:
+                        found_items.append(i)
+                        row_pos.append(first_pos[key])
+                if found_items:
+                    located.append((t, found_items, row_pos, df))
+
+    # pass 1b: extract those rows as one float matrix and apply the missing-value rule
+    extracted: List[Tuple[int, List[int], List[str], np.ndarray]] = []
+    ticker_periods: List[set] = [set() for _ in tickers]
+    with span("ft.clean_rows", blocks=len(located)):
+        for t, found_items, row_pos, df in located:
+            labels = _period_labels(df.columns, freq)
+            matrix = _clean_rows(_rows_to_float(df.iloc[row_pos]))
+            usable = [c for c, label in enumerate(labels) if label is not None]
+            if len(usable) < len(labels):
+                labels = [labels[c] for c in usable]
+                matrix = matrix[:, usable]
+            extracted.append((t, found_items, labels, matrix))
+            ticker_periods[t].update(labels)
+
+    periods = sorted(set().union(*ticker_periods)) if ticker_periods else []
+    if freq != "annual" and periods:
+        # gap-free quarter axis, so a rolling window of 4 positions is 4 quarters
+        periods = [str(p) for p in pd.period_range(periods[0], periods[-1], freq="Q")]
+    period_pos = {p: j for j, p in enumerate(periods)}
+
+    values = np.full((len(tickers), len(items), len(periods)), np.nan)
+    present = np.zeros((len(tickers), len(periods)), dtype=bool)
+    for t, p_set in enumerate(ticker_periods):
+        present[t, [period_pos[p] for p in p_set]] = True
+
+    # pass 2: scatter each matrix into the block (last duplicate period wins)
+    for t, found_items, labels, matrix in extracted:
+        last_col = {label: c for c, label in enumerate(labels)}
+        cols = np.fromiter(last_col.values(), dtype=np.intp)
+        dest = np.fromiter((period_pos[label] for label in last_col), dtype=np.intp)
+        values[t, np.asarray(found_items)[:, None], dest[None, :]] = matrix[:, cols]
+
+    return StatementBlock(tickers=tickers, items=items, periods=periods, values=values, present=present)
+
+
+def _rolling_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """Trailing sum over the last axis; NaN where the window is incomplete or holds a NaN."""
+    out = np.full(values.shape, np.nan)
+    if values.shape[-1] >= window:
+        out[..., window - 1:] = np.lib.stride_tricks.sliding_window_view(values, window, axis=-1).sum(axis=-1)
+    return out
+
+
+def ttm_block(block: StatementBlock, window: int = TTM_QUARTERS) -> StatementBlock:
+    """Quarterly block -> trailing-twelve-month block (flows summed, stocks kept)."""
+    values = block.values.copy()
+    flow = [i for i, key in enumerate(block.items) if LINE_ITEMS[key].statement in FLOW_STATEMENTS]
+    if flow:
+        values[:, flow, :] = _rolling_sum(block.values[:, flow, :], window)
+    # a TTM period needs the ticker to report all quarters of its window
+    present = _rolling_sum(block.present.astype(np.float64), window) == window
+    return StatementBlock(tickers=block.tickers, items=block.items, periods=block.periods, values=values, present=present)
+
+
+def block_to_frame(block: StatementBlock, out: np.ndarray, columns: Sequence[str], freq: str = "annual") -> pd.DataFrame:
+    """Flatten (ticker, column, period) results to a (ticker, year) or (ticker, period) MultiIndex frame."""
+    t_idx, p_idx = np.nonzero(block.present)
+    if len(t_idx) == 0:
+        return pd.DataFrame()
+    if freq == "annual":
+        periods, level = np.asarray(block.periods, dtype=object)[p_idx], "year"
+    else:
+        periods, level = pd.PeriodIndex(block.periods, freq="Q")[p_idx], "period"
+    index = pd.MultiIndex.from_arrays(
+        [np.asarray(block.tickers, dtype=object)[t_idx], periods],
+        names=["ticker", level],
+    )
+    return pd.DataFrame(out[t_idx, :, p_idx], index=index, columns=list(columns))
+
+
+def compute_metrics_panel(
+    frames: Dict[str, Dict[str, pd.DataFrame]],
+    formulas: FormulaSet,
+    sources: Optional[Dict[str, str]] = None,
+    freq: str = "annual",
+) -> pd.DataFrame:
+    """
+    frames -> (ticker, period) x indicator_key frame, one vectorized pass for all tickers.
+
+    Only the line items referenced by `formulas` are extracted; every one must be
+    in LINE_ITEMS (load_schema checks this). freq="ttm" expects quarterly statements.
+    """
+    if freq not in FREQS:
+        raise ValueError(f"Unknown freq={freq!r}. Use one of {FREQS}.")
+    unknown = [k for k in formulas.inputs if k not in LINE_ITEMS]
+    if unknown:
+        raise FormulaError(f"Unknown line item(s) {', '.join(map(repr, unknown))}")
+    block = build_block(frames, formulas.inputs, sources, freq)
+    if freq == "ttm":
+        block = ttm_block(block)
+
+    with span("ft.compute_ratios", tickers=len(block.tickers), indicators=len(formulas.keys)):
+        results = formulas.evaluate(block.item)
+        out = np.stack([np.broadcast_to(results[k], block.present.shape) for k in formulas.keys], axis=1)
+        out[~np.isfinite(out)] = np.nan
+    return block_to_frame(block, out, formulas.keys, freq)
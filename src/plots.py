@@ -1,9 +1,16 @@
 from __future__ import annotations
 
-from typing import Optional, Sequence
+import hashlib
+import io
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
 
 import pandas as pd
-import matplotlib.pyplot as plt
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
 
 from .schema import Schema, IndicatorMeta, GroupMeta
 
@@ -12,6 +19,21 @@ class PlotError(RuntimeError):
     pass
 
 
+# Figures are built through the object-oriented API on their own Agg canvas,
+# never through pyplot: nothing is registered in pyplot's global figure
+# manager, so a long-running server does not accumulate figures, and
+# independent figures can be drawn from different threads.
+def new_figure(**kwargs) -> Figure:
+    fig = Figure(**kwargs)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def close_figure(fig: Figure) -> None:
+    """Release a figure's artists now instead of waiting for the garbage collector."""
+    fig.clear()
+
+
 def _ensure_timeseries_index(df: pd.DataFrame) -> pd.DataFrame:
     if df is None or df.empty:
         raise PlotError("No data to plot (empty DataFrame).")
@@ -35,14 +57,14 @@ def _format_title(meta: IndicatorMeta) -> str:
     return f"{meta.indicator_name} ({meta.unit})" if meta.unit else meta.indicator_name
 
 
-def plot_single_indicator(df_metrics: pd.DataFrame, meta: IndicatorMeta, title_prefix: str = "") -> plt.Figure:
+def plot_single_indicator(df_metrics: pd.DataFrame, meta: IndicatorMeta, title_prefix: str = "") -> Figure:
     df = _ensure_timeseries_index(df_metrics)
     _validate_keys_exist(df, [meta.key])
 
     x = df.index.astype(str)
     y = df[meta.key].astype(float)
 
-    fig = plt.figure()
+    fig = new_figure()
     ax = fig.add_subplot(111)
     ax.plot(x, y, marker="o")
     ax.set_title(f"{title_prefix}{_format_title(meta)}".strip())
@@ -55,7 +77,7 @@ def plot_single_indicator(df_metrics: pd.DataFrame, meta: IndicatorMeta, title_p
     return fig
 
 
-def plot_group_overlay(df_metrics: pd.DataFrame, schema: Schema, group: GroupMeta, title_prefix: str = "") -> plt.Figure:
+def plot_group_overlay(df_metrics: pd.DataFrame, schema: Schema, group: GroupMeta, title_prefix: str = "") -> Figure:
     df = _ensure_timeseries_index(df_metrics)
     keys = group.indicator_keys
     _validate_keys_exist(df, keys)
@@ -66,11 +88,15 @@ def plot_group_overlay(df_metrics: pd.DataFrame, schema: Schema, group: GroupMet
         if len(units) > 1:
             raise PlotError(f"Group '{group.key}' has mixed units {sorted(units)}; overlay disabled in V1.")
 
-    x = df.index.astype(str)
-
-    fig = plt.figure()
+    fig = new_figure()
     ax = fig.add_subplot(111)
+    _draw_group(ax, df, group, metas, title_prefix)
+    fig.tight_layout()
+    return fig
+
 
+def _draw_group(ax, df: pd.DataFrame, group: GroupMeta, metas: Sequence[IndicatorMeta], title_prefix: str = "") -> None:
+    x = df.index.astype(str)
     for m in metas:
         ax.plot(x, df[m.key].astype(float), marker="o", label=m.indicator_name)
 
@@ -82,6 +108,50 @@ def plot_group_overlay(df_metrics: pd.DataFrame, schema: Schema, group: GroupMet
         ax.tick_params(axis="x", labelrotation=45)
     ax.grid(True, linewidth=0.3)
     ax.legend()
+
+
+def plot_dashboard(df_metrics: pd.DataFrame, schema: Schema, title_prefix: str = "", ncols: int = 2) -> Figure:
+    """
+    Every schema group as one subplot of a single figure, sharing the period axis.
+
+    Groups that cannot be overlaid (missing columns, mixed units) get a note in
+    their panel instead of failing the whole dashboard.
+    """
+    df = _ensure_timeseries_index(df_metrics)
+    groups = list(schema.groups.values())
+    if not groups:
+        raise PlotError("Schema has no groups to plot.")
+
+    ncols = max(1, min(ncols, len(groups)))
+    nrows = -(-len(groups) // ncols)
+    fig = new_figure(figsize=(6.4 * ncols, 3.6 * nrows))
+    axes = fig.subplots(nrows, ncols, sharex=True, squeeze=False).ravel()
+
+    plotted = set()
+    for i, (ax, group) in enumerate(zip(axes, groups)):
+        keys = [k for k in group.indicator_keys if k in df.columns and k in schema.indicators]
+        metas = [schema.indicators[k] for k in keys]
+        units = {m.unit for m in metas}
+        if not metas or (group.require_same_unit and len(units) > 1):
+            reason = "no data" if not metas else f"mixed units {sorted(units)}"
+            ax.set_title(group.display_name)
+            ax.text(0.5, 0.5, reason, ha="center", va="center", transform=ax.transAxes)
+            ax.set_yticks([])
+            continue
+        _draw_group(ax, df, group, metas)
+        plotted.add(i)
+        if not ax.get_subplotspec().is_last_row():
+            ax.set_xlabel("")
+    for i in range(len(groups), len(axes)):
+        axes[i].set_visible(False)
+        # the panel above an empty slot is the bottom of its column
+        axes[i - ncols].xaxis.set_tick_params(labelbottom=True)
+        if i - ncols in plotted:
+            # a "no data" placeholder gets no axis label
+            axes[i - ncols].set_xlabel("Period")
+
+    if title_prefix.strip():
+        fig.suptitle(title_prefix.strip(" -"))
     fig.tight_layout()
     return fig
 
@@ -93,7 +163,7 @@ def plot_by_selection(
     indicator_key: Optional[str] = None,
     group_key: Optional[str] = None,
     title_prefix: str = "",
-) -> plt.Figure:
+) -> Figure:
     if indicator_key:
         if indicator_key not in schema.indicators:
             raise PlotError(f"Unknown indicator_key: {indicator_key}")
@@ -105,3 +175,159 @@ def plot_by_selection(
         return plot_group_overlay(df_metrics, schema, schema.groups[group_key], title_prefix=title_prefix)
 
     raise PlotError("Either indicator_key or group_key must be provided.")
+
+
+# -----------------------------
+# rendered-figure cache
+# -----------------------------
+RENDER_FORMATS = ("png", "svg")
+DEFAULT_RENDER_CACHE_BYTES = 64 * 1024 * 1024
+
+
+@dataclass
+class RenderCacheStats:
+    hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+
+
+class RenderCache:
+    """LRU of rendered image bytes, bounded by total size."""
+
+    def __init__(self, max_bytes: int = DEFAULT_RENDER_CACHE_BYTES) -> None:
+        self.max_bytes = int(max_bytes)
+        self.stats = RenderCacheStats()
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            data = self._entries.get(key)
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.stats.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes) -> None:
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            if len(data) > self.max_bytes:
+                return
+            self._entries[key] = data
+            self._size += len(data)
+            while self._size > self.max_bytes:
+                _, dropped = self._entries.popitem(last=False)
+                self._size -= len(dropped)
+                self.stats.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
+
+
+_RENDER_CACHE = RenderCache(int(float(os.getenv("PLOT_CACHE_MAX_MB", 64)) * 1024 * 1024))
+
+
+def get_render_cache() -> RenderCache:
+    return _RENDER_CACHE
+
+
+def render_figure(fig: Figure, fmt: str = "png", dpi: int = 100) -> bytes:
+    """Rasterize (png) or serialize (svg) a figure, then close it (the figure is empty afterwards)."""
+    if fmt not in RENDER_FORMATS:
+        raise PlotError(f"Unsupported format {fmt!r}; use one of {RENDER_FORMATS}.")
+    buf = io.BytesIO()
+    try:
+        fig.savefig(buf, format=fmt, dpi=dpi)
+    finally:
+        close_figure(fig)
+    return buf.getvalue()
+
+
+def _selection_keys(schema: Schema, indicator_key: Optional[str], group_key: Optional[str]) -> List[str]:
+    if indicator_key:
+        return [indicator_key]
+    if group_key and group_key in schema.groups:
+        return list(schema.groups[group_key].indicator_keys)
+    return []
+
+
+def _selection_fingerprint(
+    df_metrics: pd.DataFrame,
+    schema: Schema,
+    indicator_key: Optional[str],
+    group_key: Optional[str],
+    title_prefix: str,
+    fmt: str,
+    dpi: int,
+) -> str:
+    """sha256 of everything the chart depends on: plotted columns, their metadata and render options."""
+    keys = _selection_keys(schema, indicator_key, group_key)
+    groups = [schema.groups.get(group_key)] if group_key else []
+    return _fingerprint(df_metrics, schema, keys, groups, (indicator_key, group_key, title_prefix, fmt, dpi))
+
+
+def _fingerprint(df_metrics: pd.DataFrame, schema: Schema, keys: Sequence[str], groups: Sequence[object], options: tuple) -> str:
+    cols = [k for k in keys if k in df_metrics.columns]
+    h = hashlib.sha256()
+    h.update(repr((options, cols)).encode("utf-8"))
+    h.update(repr([schema.indicators.get(k) for k in keys]).encode("utf-8"))
+    h.update(repr(list(groups)).encode("utf-8"))
+    h.update(repr(list(df_metrics.index)).encode("utf-8"))
+    if cols:
+        h.update(pd.util.hash_pandas_object(df_metrics[cols], index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def render_by_selection(
+    df_metrics: pd.DataFrame,
+    schema: Schema,
+    *,
+    indicator_key: Optional[str] = None,
+    group_key: Optional[str] = None,
+    title_prefix: str = "",
+    fmt: str = "png",
+    dpi: int = 100,
+) -> bytes:
+    """
+    plot_by_selection rendered to image bytes, served from an LRU cache when
+    the plotted data, metadata and options are unchanged.
+    """
+    key = _selection_fingerprint(df_metrics, schema, indicator_key, group_key, title_prefix, fmt, dpi)
+    data = _RENDER_CACHE.get(key)
+    if data is None:
+        fig = plot_by_selection(
+            df_metrics, schema, indicator_key=indicator_key, group_key=group_key, title_prefix=title_prefix
+        )
+        data = render_figure(fig, fmt, dpi)
+        _RENDER_CACHE.put(key, data)
+    return data
+
+
+def render_dashboard(
+    df_metrics: pd.DataFrame,
+    schema: Schema,
+    *,
+    title_prefix: str = "",
+    fmt: str = "png",
+    dpi: int = 100,
+) -> bytes:
+    """plot_dashboard rendered to image bytes, cached like render_by_selection."""
+    groups = list(schema.groups.values())
+    keys = list(dict.fromkeys(k for g in groups for k in g.indicator_keys))
+    key = _fingerprint(df_metrics, schema, keys, groups, ("dashboard", title_prefix, fmt, dpi))
+    data = _RENDER_CACHE.get(key)
+    if data is None:
+        data = render_figure(plot_dashboard(df_metrics, schema, title_prefix=title_prefix), fmt, dpi)
+        _RENDER_CACHE.put(key, data)
+    return data
@@ -0,0 +1,132 @@
+"""
+Provider health registry: one circuit breaker per (provider, statement, freq).
+
+Free-tier FMP keys return empty statements, so probing FMP before falling back
+to Yahoo costs a full wasted round trip on every request. The breaker remembers
+that outcome:
+- closed:    requests go to the provider; `threshold` consecutive failures
+             open the breaker. Empty answers are recorded per ticker and count
+             once per distinct ticker, so a few uncovered or delisted tickers
+             asked about repeatedly cannot open it for everyone
+- open:      the provider is skipped for `cooldown` seconds
+- half-open: after the cool-down one caller is let through to re-probe;
+             success closes the breaker, failure re-opens it
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, Hashable, Optional, Set, Tuple
+
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+DEFAULT_THRESHOLD = 3
+DEFAULT_COOLDOWN_SECONDS = 300.0
+
+
+@dataclass(frozen=True)
+class BreakerState:
+    state: str
+    failures: int
+    opened_at: Optional[float]
+    skipped: int
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int = DEFAULT_THRESHOLD, cooldown: float = DEFAULT_COOLDOWN_SECONDS) -> None:
+        self.threshold = max(1, int(threshold))
+        self.cooldown = float(cooldown)
+
+        self._state = CLOSED
+        self._failures = 0
+        self._failed_keys: Set[Hashable] = set()
+        self._opened_at: Optional[float] = None
+        self._probing = False
+        self._skipped = 0
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether the caller should try the provider now."""
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN and time.monotonic() - self._opened_at >= self.cooldown:
+                self._state = HALF_OPEN
+            if self._state == HALF_OPEN and not self._probing:
+                # exactly one re-probe; everyone else keeps using the fallback
+                self._probing = True
+                return True
+            self._skipped += 1
+            return False
+
+    def is_open(self) -> bool:
+        """Whether allow() would skip the provider right now (read-only, claims no probe)."""
+        with self._lock:
+            if self._state == OPEN:
+                return time.monotonic() - self._opened_at < self.cooldown
+            return self._state == HALF_OPEN and self._probing
+
+    def record_success(self) -> None:
+        with self._lock:
+            self._state = CLOSED
+            self._failures = 0
+            self._failed_keys.clear()
+            self._opened_at = None
+            self._probing = False
+
+    def record_failure(self, key: Optional[Hashable] = None) -> None:
+        """
+        Count a failed call. With a key (the ticker of an empty answer) only the
+        first failure per key counts, so `threshold` means distinct tickers.
+        """
+        with self._lock:
+            if key is None or key not in self._failed_keys:
+                self._failures += 1
+                if key is not None:
+                    self._failed_keys.add(key)
+            if self._state == HALF_OPEN or self._failures >= self.threshold:
+                self._state = OPEN
+                self._opened_at = time.monotonic()
+            self._probing = False
+
+    def snapshot(self) -> BreakerState:
+        with self._lock:
+            return BreakerState(self._state, self._failures, self._opened_at, self._skipped)
+
+
+# -----------------------------
+# process-wide registry
+# -----------------------------
+_BREAKERS: Dict[Tuple[str, str, str], CircuitBreaker] = {}
+_BREAKERS_LOCK = threading.Lock()
+
+
+def provider_breaker(provider: str, statement: str, freq: str = "annual") -> CircuitBreaker:
+    # free tiers may serve annual but not quarterly statements, so freq is part of the key
+    key = (provider, statement, freq)
+    with _BREAKERS_LOCK:
+        breaker = _BREAKERS.get(key)
+        if breaker is None:
+            breaker = CircuitBreaker(
+                int(os.getenv("FT_BREAKER_THRESHOLD", DEFAULT_THRESHOLD)),
+                float(os.getenv("FT_BREAKER_COOLDOWN", DEFAULT_COOLDOWN_SECONDS)),
+            )
+            _BREAKERS[key] = breaker
+        return breaker
+
+
+def provider_health() -> Dict[Tuple[str, str, str], BreakerState]:
+    with _BREAKERS_LOCK:
+        breakers = dict(_BREAKERS)
+    return {key: breaker.snapshot() for key, breaker in breakers.items()}
+
+
+def reset_provider_health() -> None:
+    with _BREAKERS_LOCK:
+        _BREAKERS.clear()
@@ -0,0 +1,321 @@
+"""
+Pluggable statement providers for ft_adapter.
+
+ft_adapter never builds a FinanceToolkit Toolkit directly; it asks the active
+provider for a toolkit-like object (anything exposing the statement methods,
+e.g. get_income_statement()). Three providers ship here:
+
+- LiveProvider:      real FinanceToolkit (default)
+- RecordingProvider: live calls, every raw statement frame is also written to
+                     a fixture directory (one pickle per provider/ticker/method)
+- ReplayProvider:    serves recorded fixtures with no network access, with
+                     optional injected latency and failure rate, for
+                     reproducible benchmarks and load tests
+
+Selected with FT_PROVIDER_MODE=live|record|replay (+ FT_FIXTURE_DIR,
+FT_REPLAY_LATENCY_MS, FT_REPLAY_FAILURE_RATE, FT_REPLAY_SEED) or set_provider().
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import re
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+from financetoolkit import Toolkit
+
+
+DEFAULT_FIXTURE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "fixtures"
+
+
+class ReplayFailure(ConnectionError):
+    """Injected provider failure (ReplayProvider.failure_rate)."""
+
+
+def _slug(s: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]+", "_", s)
+
+
+def _fixture_path(root: Path, data_source: str, ticker: str, method: str, quarterly: bool = False) -> Path:
+    suffix = "_quarterly" if quarterly else ""
+    return root / _slug(data_source) / _slug(ticker) / f"{_slug(method)}{suffix}.pkl"
+
+
+def _per_ticker(obj: Any, tickers: List[str]) -> Dict[str, pd.DataFrame]:
+    """Split a raw Toolkit result (single frame, MultiIndex frame or dict) per ticker."""
+    if isinstance(obj, dict):
+        return {t: obj[t] for t in tickers if isinstance(obj.get(t), pd.DataFrame)}
+    if not isinstance(obj, pd.DataFrame):
+        return {}
+    if isinstance(obj.index, pd.MultiIndex):
+        level = obj.index.get_level_values(0)
+        return {t: obj.xs(t, level=0) for t in tickers if t in level}
+    return {tickers[0]: obj} if len(tickers) == 1 else {}
+
+
+def _since(df: pd.DataFrame, start_date: Optional[str]) -> pd.DataFrame:
+    """Columns (periods) starting on or after start_date, like Toolkit(start_date=...)."""
+    if not start_date or df.empty:
+        return df
+    start = pd.Timestamp(start_date)
+    keep = []
+    for col in df.columns:
+        try:
+            period = col if isinstance(col, pd.Period) else pd.Period(str(col))
+            keep.append(period.start_time >= start)
+        except (ValueError, TypeError):
+            keep.append(True)
+    return df.loc[:, keep]
+
+
+# FinanceToolkit keeps the raw statements its ratio getters compute from in
+# these attributes (rows: (ticker, line item), columns: Period). A ratio getter
+# only downloads a statement when its attribute is still empty.
+_TOOLKIT_STATEMENT_ATTRS: Dict[str, str] = {
+    "income": "_income_statement",
+    "balance": "_balance_sheet_statement",
+}
+
+
+def seed_toolkit(tk: Any, ticker: str, statements: Dict[str, pd.DataFrame], quarterly: bool = False) -> None:
+    """
+    Hand statements loaded elsewhere (cache, warehouse, earlier downloads) to a
+    Toolkit, so its ratio getters reuse them instead of downloading them again.
+    Best effort: stand-ins without the attributes, and attributes already
+    filled by the Toolkit itself, are left alone.
+    """
+    tk = getattr(tk, "_inner", tk)  # _RecordingToolkit wraps the real Toolkit
+    for statement, attr in _TOOLKIT_STATEMENT_ATTRS.items():
+        df = statements.get(statement)
+        current = getattr(tk, attr, None)
+        if df is None or df.empty or not isinstance(current, pd.DataFrame) or not current.empty:
+            continue
+        try:
+            columns = pd.PeriodIndex([str(c) for c in df.columns], freq="Q" if quarterly else "Y")
+        except (ValueError, TypeError):
+            continue
+        seeded = df.copy()
+        seeded.columns = columns
+        setattr(tk, attr, pd.concat({ticker: seeded}))
+
+
+# -----------------------------
+# providers
+# -----------------------------
+class LiveProvider:
+    name = "live"
+
+    def make_toolkit(
+        self,
+        data_source: str,
+        tickers: List[str],
+        fmp_key: Optional[str] = None,
+        start_date: Optional[str] = None,
+        quarterly: bool = False,
+    ) -> Any:
+        extra = {"start_date": start_date} if start_date else {}
+        if data_source == "FinancialModelingPrep":
+            return Toolkit(list(tickers), api_key=fmp_key, progress_bar=False, quarterly=quarterly, sleep_timer=0.1, **extra)
+        if quarterly:
+            extra["quarterly"] = True
+        return Toolkit(list(tickers), progress_bar=False, **extra)
+
+
+class _RecordingToolkit:
+    def __init__(self, inner: Any, provider: "RecordingProvider", data_source: str, tickers: List[str], quarterly: bool) -> None:
+        self._inner = inner
+        self._provider = provider
+        self._data_source = data_source
+        self._tickers = tickers
+        self._quarterly = quarterly
+
+    def __getattr__(self, name: str) -> Any:
+        attr = getattr(self._inner, name)
+        if not (name.startswith("get_") and callable(attr)):
+            return attr
+
+        def call(*args, **kwargs):
+            obj = attr(*args, **kwargs)
+            for ticker, df in _per_ticker(obj, self._tickers).items():
+                self._provider.save(self._data_source, ticker, name, df, self._quarterly)
+            return obj
+
+        return call
+
+
+class RecordingProvider:
+    """Live provider that also writes every raw statement frame to `root`."""
+
+    name = "record"
+
+    def __init__(self, root: Path = DEFAULT_FIXTURE_DIR, inner: Optional[LiveProvider] = None) -> None:
+        self.root = Path(root)
+        self.inner = inner or LiveProvider()
+        self._lock = threading.Lock()
+
+    def make_toolkit(
+        self,
+        data_source: str,
+        tickers: List[str],
+        fmp_key: Optional[str] = None,
+        start_date: Optional[str] = None,
+        quarterly: bool = False,
+    ) -> Any:
+        tk = self.inner.make_toolkit(data_source, tickers, fmp_key, start_date, quarterly)
+        return _RecordingToolkit(tk, self, data_source, list(tickers), quarterly)
+
+    def save(self, data_source: str, ticker: str, method: str, df: pd.DataFrame, quarterly: bool = False) -> None:
+        if df.empty:
+            return
+        path = _fixture_path(self.root, data_source, ticker, method, quarterly)
+        with self._lock:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            if path.exists():
+                # incremental (start_date) calls only carry new periods: merge them in
+                old = pd.read_pickle(path)
+                df = pd.concat([old.drop(columns=df.columns, errors="ignore"), df], axis=1)
+                df = df[sorted(df.columns, key=str)]
+            tmp = path.with_suffix(".tmp")
+            df.to_pickle(tmp)
+            os.replace(tmp, path)
+
+
+class _ReplayToolkit:
+    def __init__(
+        self,
+        provider: "ReplayProvider",
+        data_source: str,
+        tickers: List[str],
+        start_date: Optional[str],
+        quarterly: bool,
+    ) -> None:
+        self._provider = provider
+        self._data_source = data_source
+        self._tickers = tickers
+        self._start_date = start_date
+        self._quarterly = quarterly
+
+    def __getattr__(self, name: str) -> Callable[..., pd.DataFrame]:
+        if not name.startswith("get_"):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self._provider.serve(
+            self._data_source, self._tickers, name, self._start_date, self._quarterly
+        )
+
+
+class ReplayProvider:
+    """
+    Serves recorded fixtures. Missing fixtures come back as empty frames, the
+    same way FinanceToolkit reports tickers a provider does not cover.
+
+    latency:      seconds slept per statement call
+    failure_rate: probability that a call raises ReplayFailure
+    seed:         makes the injected failures reproducible
+    """
+
+    name = "replay"
+
+    def __init__(
+        self,
+        root: Path = DEFAULT_FIXTURE_DIR,
+        latency: float = 0.0,
+        failure_rate: float = 0.0,
+        seed: Optional[int] = None,
+    ) -> None:
+        self.root = Path(root)
+        self.latency = float(latency)
+        self.failure_rate = float(failure_rate)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._frames: Dict[Path, pd.DataFrame] = {}
+        self._frames_lock = threading.Lock()
+
+    def make_toolkit(
+        self,
+        data_source: str,
+        tickers: List[str],
+        fmp_key: Optional[str] = None,
+        start_date: Optional[str] = None,
+        quarterly: bool = False,
+    ) -> Any:
+        return _ReplayToolkit(self, data_source, list(tickers), start_date, quarterly)
+
+    def _load(self, data_source: str, ticker: str, method: str, quarterly: bool = False) -> pd.DataFrame:
+        path = _fixture_path(self.root, data_source, ticker, method, quarterly)
+        with self._frames_lock:
+            df = self._frames.get(path)
+        if df is None:
+            df = pd.read_pickle(path) if path.exists() else pd.DataFrame()
+            with self._frames_lock:
+                self._frames[path] = df
+        return df.copy()
+
+    def serve(
+        self,
+        data_source: str,
+        tickers: List[str],
+        method: str,
+        start_date: Optional[str] = None,
+        quarterly: bool = False,
+    ) -> pd.DataFrame:
+        if self.latency > 0:
+            time.sleep(self.latency)
+        if self.failure_rate > 0:
+            with self._rng_lock:
+                failed = self._rng.random() < self.failure_rate
+            if failed:
+                raise ReplayFailure(f"Injected failure: {data_source} {method} {tickers}")
+
+        frames = {t: _since(self._load(data_source, t, method, quarterly), start_date) for t in tickers}
+        if len(tickers) == 1:
+            return frames[tickers[0]]
+        present = {t: df for t, df in frames.items() if not df.empty}
+        if not present:
+            return pd.DataFrame()
+        # multi-ticker Toolkit layout: rows are (ticker, line item)
+        return pd.concat(present, axis=0)
+
+
+# -----------------------------
+# process-wide provider
+# -----------------------------
+_PROVIDER: Optional[Any] = None
+_PROVIDER_LOCK = threading.Lock()
+
+
+def provider_from_env() -> Any:
+    mode = os.getenv("FT_PROVIDER_MODE", "live").strip().lower()
+    root = Path(os.getenv("FT_FIXTURE_DIR", str(DEFAULT_FIXTURE_DIR)))
+    if mode == "record":
+        return RecordingProvider(root)
+    if mode == "replay":
+        seed = os.getenv("FT_REPLAY_SEED")
+        return ReplayProvider(
+            root,
+            latency=float(os.getenv("FT_REPLAY_LATENCY_MS", "0")) / 1000.0,
+            failure_rate=float(os.getenv("FT_REPLAY_FAILURE_RATE", "0")),
+            seed=int(seed) if seed else None,
+        )
+    if mode != "live":
+        raise ValueError(f"Unknown FT_PROVIDER_MODE: {mode!r} (expected live, record or replay)")
+    return LiveProvider()
+
+
+def get_provider() -> Any:
+    global _PROVIDER
+    with _PROVIDER_LOCK:
+        if _PROVIDER is None:
+            _PROVIDER = provider_from_env()
+        return _PROVIDER
+
+
+def set_provider(provider: Optional[Any]) -> None:
+    """Replace the process-wide provider (None = re-read FT_PROVIDER_MODE on next use)."""
+    global _PROVIDER
+    with _PROVIDER_LOCK:
+        _PROVIDER = provider
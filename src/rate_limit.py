@@ -0,0 +1,181 @@
+"""
+Process-wide rate limiting for data providers and the LLM API.
+
+One token bucket per provider paces outgoing requests at the provider's
+ceiling. When a provider signals throttling the limiter backs off
+exponentially and pauses the whole provider; successful calls shrink the
+penalty again. Signals:
+- report_throttled(): an HTTP 429 / rate-limit error (Retry-After honoured)
+- report_empty(): an empty answer where data is known to exist. FinanceToolkit
+  turns HTTP errors into empty tables, so under pressure this is the only sign
+  a live provider gives; `empty_streak` of them in a row count as throttling.
+
+Wait time is recorded per provider (see RateLimiter.stats / rate_limit_stats).
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Dict, Optional
+
+
+# provider -> (requests per second, burst)
+DEFAULT_RATES: Dict[str, tuple] = {
+    "FinancialModelingPrep": (5.0, 5),
+    "Yahoo Finance": (2.0, 4),
+    "DeepSeek": (5.0, 5),
+}
+FALLBACK_RATE = (2.0, 2)
+
+
+@dataclass
+class RateLimiterStats:
+    acquired: int = 0
+    waited: int = 0               # acquisitions that had to sleep
+    wait_seconds: float = 0.0
+    max_wait_seconds: float = 0.0
+    throttled: int = 0            # back-offs: 429s + streaks of empty answers for covered tickers
+    empty: int = 0                # empty answers for covered tickers reported
+    backoff_seconds: float = 0.0  # current penalty
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        rate: float,
+        burst: int = 1,
+        *,
+        min_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        backoff_factor: float = 2.0,
+        empty_streak: int = 2,
+    ) -> None:
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.min_backoff = float(min_backoff)
+        self.max_backoff = float(max_backoff)
+        self.backoff_factor = float(backoff_factor)
+        self.empty_streak = max(1, int(empty_streak))
+
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._backoff = 0.0
+        self._empties = 0
+        self._stats = RateLimiterStats()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self) -> float:
+        """Block until a request may be sent; returns the seconds spent waiting."""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    self._stats.acquired += 1
+                    if waited > 0:
+                        self._stats.waited += 1
+                        self._stats.wait_seconds += waited
+                        self._stats.max_wait_seconds = max(self._stats.max_wait_seconds, waited)
+                    return waited
+                delay = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate if self.rate > 0 else 1.0)
+            time.sleep(delay)
+            waited += delay
+
+    def report_success(self) -> None:
+        with self._lock:
+            self._empties = 0
+            if self._backoff:
+                self._backoff /= self.backoff_factor
+                if self._backoff < self.min_backoff:
+                    self._backoff = 0.0
+                self._stats.backoff_seconds = self._backoff
+
+    def report_throttled(self, retry_after: Optional[float] = None) -> None:
+        """Pause the provider: Retry-After if given, otherwise the next backoff step."""
+        with self._lock:
+            self._backoff = min(self.max_backoff, max(self.min_backoff, self._backoff * self.backoff_factor))
+            pause = float(retry_after) if retry_after is not None else self._backoff
+            self._blocked_until = max(self._blocked_until, time.monotonic() + pause)
+            # drain the bucket so the resumed stream starts paced, not as a burst
+            self._tokens = 0.0
+            self._stats.throttled += 1
+            self._stats.backoff_seconds = self._backoff
+
+    def report_empty(self) -> None:
+        """An empty answer where data is known to exist; `empty_streak` in a row back off."""
+        with self._lock:
+            self._empties += 1
+            self._stats.empty += 1
+            streak = self._empties >= self.empty_streak
+            if streak:
+                self._empties = 0
+        if streak:
+            self.report_throttled()
+
+    def stats(self) -> RateLimiterStats:
+        with self._lock:
+            return RateLimiterStats(**asdict(self._stats))
+
+
+def is_rate_limit_error(exc: BaseException) -> bool:
+    """Best-effort detection of HTTP 429 in provider exceptions."""
+    response = getattr(exc, "response", None)
+    if getattr(response, "status_code", None) == 429:
+        return True
+    text = str(exc).lower()
+    return "429" in text or "too many requests" in text or "rate limit" in text
+
+
+def retry_after_seconds(exc: BaseException) -> Optional[float]:
+    headers = getattr(getattr(exc, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+# -----------------------------
+# process-wide registry
+# -----------------------------
+_LIMITERS: Dict[str, RateLimiter] = {}
+_LIMITERS_LOCK = threading.Lock()
+
+_RATE_ENV = {
+    "FinancialModelingPrep": "FT_FMP_RATE",
+    "Yahoo Finance": "FT_YAHOO_RATE",
+    "DeepSeek": "LLM_RATE",
+}
+
+
+def get_rate_limiter(provider: str) -> RateLimiter:
+    with _LIMITERS_LOCK:
+        limiter = _LIMITERS.get(provider)
+        if limiter is None:
+            rate, burst = DEFAULT_RATES.get(provider, FALLBACK_RATE)
+            env = _RATE_ENV.get(provider)
+            if env and os.getenv(env):
+                rate = float(os.environ[env])
+            limiter = RateLimiter(rate, burst)
+            _LIMITERS[provider] = limiter
+        return limiter
+
+
+def set_rate_limiter(provider: str, limiter: RateLimiter) -> None:
+    with _LIMITERS_LOCK:
+        _LIMITERS[provider] = limiter
+
+
+def rate_limit_stats() -> Dict[str, RateLimiterStats]:
+    with _LIMITERS_LOCK:
+        limiters = dict(_LIMITERS)
+    return {provider: limiter.stats() for provider, limiter in limiters.items()}
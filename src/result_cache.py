@@ -0,0 +1,148 @@
+"""
+In-memory cache for computed metric frames, shared by every app session.
+
+The Streamlit app holds one ResultCache per process (st.cache_resource), so
+two sessions looking at the same ticker, or one session re-running it, reuse
+the frame computed first instead of going through ft_adapter again.
+
+- entries keyed by any hashable tuple (the app uses ticker, provider,
+  periods, freq and schema version)
+- TTL per entry and LRU eviction bounded by frame memory (max_bytes)
+- concurrent misses for the same key are computed once (SingleFlight)
+- frames are stored with read-only values; every caller gets its own
+  shallow copy, so no session can mutate what another one sees
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+import pandas as pd
+
+from .singleflight import SingleFlight
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 60 * 60
+
+
+@dataclass
+class ResultCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+    refreshes: int = 0
+
+
+@dataclass
+class _Entry:
+    frame: pd.DataFrame
+    created_at: float
+    size: int
+
+
+def _freeze(df: pd.DataFrame) -> pd.DataFrame:
+    """Copy df into a frame whose values cannot be written in place."""
+    if df.empty or df.dtypes.nunique() != 1:
+        # mixed dtypes cannot share one read-only block; callers still get copies
+        return df.copy()
+    values = df.to_numpy(copy=True)
+    values.setflags(write=False)
+    frozen = pd.DataFrame(values, index=df.index.copy(), columns=df.columns.copy(), copy=False)
+    frozen.attrs = dict(df.attrs)
+    return frozen
+
+
+class ResultCache:
+    def __init__(self, max_bytes: int = DEFAULT_MAX_BYTES, ttl_seconds: float = DEFAULT_TTL_SECONDS) -> None:
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = float(ttl_seconds)
+        self.stats = ResultCacheStats()
+
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._flights = SingleFlight()
+
+    @classmethod
+    def from_env(cls) -> "ResultCache":
+        max_mb = os.getenv("FT_RESULT_CACHE_MAX_MB")
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        return cls(max_bytes, float(os.getenv("FT_RESULT_CACHE_TTL", DEFAULT_TTL_SECONDS)))
+
+    def get(self, key: Hashable) -> Optional[pd.DataFrame]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if time.time() - entry.created_at >= self.ttl_seconds:
+                del self._entries[key]
+                self.stats.expired += 1
+                return None
+            self._entries.move_to_end(key)
+            return entry.frame.copy(deep=False)
+
+    def put(self, key: Hashable, df: pd.DataFrame) -> pd.DataFrame:
+        frozen = _freeze(df)
+        size = int(frozen.memory_usage(deep=True, index=True).sum())
+        with self._lock:
+            self._entries.pop(key, None)
+            if size <= self.max_bytes:
+                self._entries[key] = _Entry(frozen, time.time(), size)
+                self._evict()
+        return frozen.copy(deep=False)
+
+    def _evict(self) -> None:
+        total = sum(e.size for e in self._entries.values())
+        while total > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            total -= entry.size
+            self.stats.evictions += 1
+
+    def get_or_compute(self, key: Hashable, compute: Callable[[], pd.DataFrame], force: bool = False) -> pd.DataFrame:
+        """
+        Cached frame for key, computing (and storing) it on a miss.
+
+        force=True skips the lookup and replaces the entry. Empty results are
+        returned but not stored, so a failed fetch is retried next time.
+        """
+        if not force:
+            df = self.get(key)
+            if df is not None:
+                self.stats.hits += 1
+                return df
+            self.stats.misses += 1
+        else:
+            self.stats.refreshes += 1
+
+        def run() -> pd.DataFrame:
+            df = compute()
+            if df is None or df.empty:
+                return df
+            return self.put(key, df)
+
+        # sessions asking for the same key at the same time share one computation
+        df = self._flights.do((key, force), run)
+        return df.copy(deep=False) if df is not None else df
+
+    def invalidate(self, key: Optional[Hashable] = None) -> None:
+        """Drop one entry, or everything when key is None."""
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._entries)
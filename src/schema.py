@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 
 import yaml
 
+from .formula import FormulaSet, compile_formulas
+from .metric_engine import LINE_ITEMS
+
 
 @dataclass(frozen=True)
 class IndicatorMeta:
@@ -34,6 +37,8 @@ class Schema:
     version: str
     indicators: Dict[str, IndicatorMeta]
     groups: Dict[str, GroupMeta]
+    # compiled `formula` fields (indicators without a formula are left out)
+    formulas: Optional[FormulaSet] = None
 
 
 def load_schema(path: str | Path = "config/indicators.yaml") -> Schema:
@@ -71,8 +76,14 @@ def load_schema(path: str | Path = "config/indicators.yaml") -> Schema:
             require_same_unit=bool(meta.get("require_same_unit", True)),
         )
 
+    # an unknown line item would otherwise only show up as an all-NaN column
+    formulas = compile_formulas(
+        {k: m.formula for k, m in indicators.items() if m.formula.strip()}, line_items=LINE_ITEMS
+    )
+
     return Schema(
         version=str(data.get("version", "unknown")),
         indicators=indicators,
         groups=groups,
+        formulas=formulas,
     )
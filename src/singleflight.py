@@ -0,0 +1,100 @@
+"""
+Single-flight request coalescing.
+
+Concurrent callers asking for the same key share one in-flight call: the first
+caller runs it, the others block until it finishes and get the same result (or
+the same exception). Nothing is kept after the call completes, so this only
+collapses bursts; caching across time is the statement cache's job.
+
+Shared results are the same object for every caller and must be treated as
+read-only.
+"""
+
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+
+@dataclass
+class SingleFlightStats:
+    calls: int = 0    # calls that actually ran
+    shared: int = 0   # callers served by someone else's in-flight call
+
+
+class _Call:
+    def __init__(self) -> None:
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+    def wait(self) -> Any:
+        self.done.wait()
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, _Call] = {}
+        self._stats = SingleFlightStats()
+        self._lock = threading.Lock()
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        """Run fn once per burst of callers with the same key."""
+        return self.do_many([key], lambda keys: {keys[0]: fn()})[key]
+
+    def do_many(
+        self,
+        keys: Sequence[Hashable],
+        fn: Callable[[List[Hashable]], Dict[Hashable, Any]],
+        on_error: Optional[Callable[[BaseException], Any]] = None,
+    ) -> Dict[Hashable, Any]:
+        """
+        Batch variant: keys already in flight are joined, fn runs once for the rest.
+        fn receives the keys this caller owns and must return a value for each.
+        With on_error, a failed key maps to on_error(exc) instead of raising.
+        """
+        owned: Dict[Hashable, _Call] = {}
+        joined: Dict[Hashable, _Call] = {}
+        with self._lock:
+            for key in dict.fromkeys(keys):
+                call = self._calls.get(key)
+                if call is None:
+                    call = owned[key] = self._calls[key] = _Call()
+                else:
+                    joined[key] = call
+            if owned:
+                self._stats.calls += 1
+            self._stats.shared += len(joined)
+
+        if owned:
+            try:
+                results = fn(list(owned))
+                for key, call in owned.items():
+                    call.result = results.get(key)
+            except BaseException as e:
+                for call in owned.values():
+                    call.error = e
+            finally:
+                with self._lock:
+                    for key in owned:
+                        self._calls.pop(key, None)
+                for call in owned.values():
+                    call.done.set()
+
+        out: Dict[Hashable, Any] = {}
+        for key in keys:
+            try:
+                out[key] = (owned.get(key) or joined[key]).wait()
+            except Exception as e:
+                if on_error is None:
+                    raise
+                out[key] = on_error(e)
+        return out
+
+    def stats(self) -> SingleFlightStats:
+        with self._lock:
+            return SingleFlightStats(self._stats.calls, self._stats.shared)
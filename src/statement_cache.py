@@ -0,0 +1,486 @@
+"""
+On-disk statement cache for ft_adapter.
+
+Raw statements returned by FinanceToolkit are stored as Parquet files (pickle
+fallback when pyarrow is missing), addressed by a hash of
+(provider, ticker, statement, freq). Annual statements change a few times a
+year, so warm requests are served from disk without touching the network.
+
+- per-statement TTL (DEFAULT_TTL_SECONDS, overridable)
+- size-bounded LRU eviction (max_bytes)
+- optional "serve stale while revalidating": an expired entry is returned
+  immediately and refreshed in a background thread
+- one JSON sidecar per entry instead of a shared index, so processes can
+  share the directory; files are read and written outside the lock
+- force_refresh(): a context in which every read goes to the provider (the
+  cached frame is still the fallback when the provider fails)
+"""
+
+from __future__ import annotations
+
+import contextvars
+import hashlib
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, asdict
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+
+DAY = 24 * 60 * 60
+
+# statement -> seconds until an entry is considered stale
+DEFAULT_TTL_SECONDS: Dict[str, float] = {
+    "income": 7 * DAY,
+    "balance": 7 * DAY,
+    "cash_flow": 7 * DAY,
+    # ratios mix in market prices, refresh them daily
+    "profitability": 1 * DAY,
+    "efficiency": 1 * DAY,
+    "valuation": 1 * DAY,
+}
+FALLBACK_TTL_SECONDS = 1 * DAY
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+DEFAULT_CACHE_DIR = Path(__file__).resolve().parents[1] / ".cache" / "statements"
+
+_LEGACY_INDEX_FILE = "index.json"
+
+# set inside force_refresh(); propagates into run_concurrently jobs with the context
+_FORCE_REFRESH: contextvars.ContextVar[bool] = contextvars.ContextVar("ft_force_refresh", default=False)
+
+
+@contextmanager
+def force_refresh() -> Iterator[None]:
+    """Treat every cache entry read in this context as expired and re-fetch it."""
+    token = _FORCE_REFRESH.set(True)
+    try:
+        yield
+    finally:
+        _FORCE_REFRESH.reset(token)
+
+
+def force_refresh_active() -> bool:
+    """Whether the caller runs inside force_refresh()."""
+    return _FORCE_REFRESH.get()
+
+
+@dataclass
+class CacheEntry:
+    provider: str
+    ticker: str
+    statement: str
+    freq: str
+    file: str
+    fetched_at: float
+    last_access: float
+    size: int
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    revalidations: int = 0
+
+
+def cache_key(provider: str, ticker: str, statement: str, freq: str = "annual") -> str:
+    """Content address of one statement: sha256 of the normalized key tuple."""
+    raw = "|".join([str(provider).strip(), str(ticker).strip().upper(), str(statement).strip(), str(freq).strip()])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def _to_storable(df: pd.DataFrame) -> pd.DataFrame:
+    """Parquet needs string labels; Period columns are stored as their str() form."""
+    out = df.copy()
+    out.columns = [str(c) for c in out.columns]
+    out.index = [str(i) for i in out.index]
+    return out
+
+
+class StatementCache:
+    def __init__(
+        self,
+        root: str | Path = DEFAULT_CACHE_DIR,
+        *,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        ttl_seconds: Optional[Dict[str, float]] = None,
+        stale_while_revalidate: bool = True,
+    ) -> None:
+        self.root = Path(root)
+        self.max_bytes = int(max_bytes)
+        self.ttl_seconds = dict(DEFAULT_TTL_SECONDS)
+        if ttl_seconds:
+            self.ttl_seconds.update(ttl_seconds)
+        self.stale_while_revalidate = stale_while_revalidate
+        self.stats = CacheStats()
+
+        self._lock = threading.RLock()
+        self._revalidating: set = set()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._entries: Dict[str, CacheEntry] = self._load_entries()
+
+    @classmethod
+    def from_env(cls) -> Optional["StatementCache"]:
+        """Build the default cache from FT_CACHE_* env vars (None when disabled)."""
+        if os.getenv("FT_CACHE_DISABLED", "").strip().lower() in ("1", "true", "yes"):
+            return None
+        root = os.getenv("FT_CACHE_DIR") or DEFAULT_CACHE_DIR
+        max_mb = os.getenv("FT_CACHE_MAX_MB")
+        max_bytes = int(float(max_mb) * 1024 * 1024) if max_mb else DEFAULT_MAX_BYTES
+        swr = os.getenv("FT_CACHE_STALE_WHILE_REVALIDATE", "1").strip().lower() not in ("0", "false", "no")
+        return cls(root, max_bytes=max_bytes, stale_while_revalidate=swr)
+
+    # -----------------------------
+    # entry metadata
+    # -----------------------------
+    # One JSON sidecar per entry (<key>.json next to the data file) instead of
+    # a shared index: a put rewrites only its own sidecar, so batch fetches stay
+    # linear and processes sharing the directory never overwrite each other.
+    # Recency is the data file's mtime, bumped with os.utime() on every hit.
+    def _meta_path(self, key: str) -> Path:
+        return self.root / f"{key}.json"
+
+    def _load_meta(self, key: str) -> Optional[CacheEntry]:
+        try:
+            entry = CacheEntry(**json.loads(self._meta_path(key).read_text(encoding="utf-8")))
+            entry.last_access = (self.root / entry.file).stat().st_mtime
+        except Exception:
+            return None
+        return entry
+
+    def _save_meta(self, key: str, entry: CacheEntry) -> None:
+        path = self._meta_path(key)
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_text(json.dumps(asdict(entry)), encoding="utf-8")
+        os.replace(tmp, path)
+
+    def _load_entries(self) -> Dict[str, CacheEntry]:
+        self._migrate_index()
+        entries: Dict[str, CacheEntry] = {}
+        for path in self.root.glob("*.json"):
+            entry = self._load_meta(path.stem)
+            if entry is not None:
+                entries[path.stem] = entry
+        return entries
+
+    def _migrate_index(self) -> None:
+        """Split an index.json written by older versions into per-entry sidecars."""
+        path = self.root / _LEGACY_INDEX_FILE
+        if not path.exists():
+            return
+        try:
+            for key, value in json.loads(path.read_text(encoding="utf-8")).items():
+                if (self.root / value["file"]).exists() and not self._meta_path(key).exists():
+                    self._save_meta(key, CacheEntry(**value))
+        except Exception:
+            # corrupt index -> orphaned data files are overwritten on put
+            pass
+        path.unlink(missing_ok=True)
+
+    def _unlink(self, key: str, entry: CacheEntry) -> None:
+        self._meta_path(key).unlink(missing_ok=True)
+        (self.root / entry.file).unlink(missing_ok=True)
+
+    # -----------------------------
+    # read / write
+    # -----------------------------
+    def ttl_for(self, statement: str) -> float:
+        return float(self.ttl_seconds.get(statement, FALLBACK_TTL_SECONDS))
+
+    def is_fresh(self, entry: CacheEntry, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return (now - entry.fetched_at) < self.ttl_for(entry.statement)
+
+    def _read_file(self, entry: CacheEntry) -> Optional[pd.DataFrame]:
+        path = self.root / entry.file
+        try:
+            if path.suffix == ".parquet":
+                return pd.read_parquet(path)
+            return pd.read_pickle(path)
+        except Exception:
+            return None
+
+    def get(self, provider: str, ticker: str, statement: str, freq: str = "annual") -> Optional[tuple]:
+        """Return (frame, is_fresh) or None on a miss."""
+        key = cache_key(provider, ticker, statement, freq)
+        with self._lock:
+            entry = self._entries.get(key)
+
+        # files are read outside the lock; only the entry map is shared state
+        df = self._read_file(entry) if entry is not None else None
+        if df is None:
+            # unknown here, or rewritten by another process sharing the directory
+            entry = self._load_meta(key)
+            df = self._read_file(entry) if entry is not None else None
+            with self._lock:
+                if df is None:
+                    entry = self._entries.pop(key, None)
+                else:
+                    self._entries[key] = entry
+            if df is None:
+                if entry is not None:
+                    self._unlink(key, entry)
+                return None
+
+        now = time.time()
+        entry.last_access = now
+        try:
+            os.utime(self.root / entry.file, (now, now))
+        except OSError:
+            pass
+        return df, self.is_fresh(entry, now)
+
+    def put(self, provider: str, ticker: str, statement: str, df: pd.DataFrame, freq: str = "annual") -> pd.DataFrame:
+        """Store df and return it in the normalized form a later get() will produce."""
+        if df is None or df.empty:
+            return pd.DataFrame()
+        key = cache_key(provider, ticker, statement, freq)
+        data = _to_storable(df)
+
+        path = self.root / f"{key}.parquet"
+        tmp = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            data.to_parquet(tmp)
+        except Exception:
+            # pyarrow missing or non-columnar values -> pickle
+            path = self.root / f"{key}.pkl"
+            data.to_pickle(tmp)
+        os.replace(tmp, path)
+
+        now = time.time()
+        entry = CacheEntry(
+            provider=provider,
+            ticker=str(ticker).upper(),
+            statement=statement,
+            freq=freq,
+            file=path.name,
+            fetched_at=now,
+            last_access=now,
+            size=path.stat().st_size,
+        )
+        self._save_meta(key, entry)
+
+        with self._lock:
+            old = self._entries.get(key)
+            self._entries[key] = entry
+            evicted = self._evict()
+        if old is not None and old.file != path.name:
+            (self.root / old.file).unlink(missing_ok=True)
+        for victim_key, victim in evicted:
+            self._unlink(victim_key, victim)
+        return data
+
+    def _evict(self) -> List[tuple]:
+        """Drop least-recently-used entries until the cache fits in max_bytes; returns them for unlinking."""
+        total = sum(e.size for e in self._entries.values())
+        if total <= self.max_bytes:
+            return []
+        evicted = []
+        for key, entry in sorted(self._entries.items(), key=lambda kv: kv[1].last_access):
+            if total <= self.max_bytes:
+                break
+            total -= entry.size
+            del self._entries[key]
+            evicted.append((key, entry))
+            self.stats.evictions += 1
+        return evicted
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+        for pattern in ("*.json", "*.parquet", "*.pkl"):
+            for path in self.root.glob(pattern):
+                path.unlink(missing_ok=True)
+
+    @property
+    def size_bytes(self) -> int:
+        with self._lock:
+            return sum(e.size for e in self._entries.values())
+
+    # -----------------------------
+    # read-through
+    # -----------------------------
+    def get_or_fetch(
+        self,
+        provider: str,
+        ticker: str,
+        statement: str,
+        fetch: Callable[[], pd.DataFrame],
+        freq: str = "annual",
+    ) -> pd.DataFrame:
+        """
+        Serve from disk when possible, otherwise call fetch() and store the result.
+
+        An expired entry is still returned when the provider fails or comes back
+        empty, so a rate-limited provider never replaces good data with NaN rows.
+        """
+        cached = self.get(provider, ticker, statement, freq)
+        if cached is not None and not _FORCE_REFRESH.get():
+            df, fresh = cached
+            if fresh:
+                self.stats.hits += 1
+                return df
+            if self.stale_while_revalidate:
+                self.stats.stale_hits += 1
+                self._revalidate_async(provider, ticker, statement, fetch, freq)
+                return df
+
+        self.stats.misses += 1
+        try:
+            df_new = fetch()
+        except Exception:
+            if cached is not None:
+                return cached[0]
+            raise
+
+        if df_new is None or df_new.empty:
+            return cached[0] if cached is not None else pd.DataFrame()
+
+        return self.put(provider, ticker, statement, df_new, freq)
+
+    def get_or_fetch_many(
+        self,
+        provider: str,
+        tickers: List[str],
+        statement: str,
+        fetch_many: Callable[[List[str]], Dict[str, pd.DataFrame]],
+        freq: str = "annual",
+    ) -> Dict[str, pd.DataFrame]:
+        """
+        Batch variant of get_or_fetch: cache misses are fetched with a single
+        fetch_many(missing_tickers) call. A provider failure degrades to stale
+        data (or empty frames) per ticker instead of failing the whole batch.
+        """
+        out: Dict[str, pd.DataFrame] = {}
+        stale: Dict[str, pd.DataFrame] = {}
+        missing: List[str] = []
+        refresh = _FORCE_REFRESH.get()
+
+        for ticker in tickers:
+            cached = self.get(provider, ticker, statement, freq)
+            if cached is None:
+                missing.append(ticker)
+                continue
+            df, fresh = cached
+            if refresh:
+                missing.append(ticker)
+                stale[ticker] = df
+            elif fresh:
+                self.stats.hits += 1
+                out[ticker] = df
+            elif self.stale_while_revalidate:
+                self.stats.stale_hits += 1
+                out[ticker] = df
+                stale[ticker] = df
+            else:
+                missing.append(ticker)
+                stale[ticker] = df
+
+        if stale and self.stale_while_revalidate and not refresh:
+            self._revalidate_many_async(provider, list(stale), statement, fetch_many, freq)
+
+        if missing:
+            self.stats.misses += len(missing)
+            try:
+                fetched = fetch_many(missing) or {}
+            except Exception:
+                fetched = {}
+            for ticker in missing:
+                df_new = fetched.get(ticker)
+                if df_new is None or df_new.empty:
+                    out[ticker] = stale.get(ticker, pd.DataFrame())
+                else:
+                    out[ticker] = self.put(provider, ticker, statement, df_new, freq)
+
+        return {t: out[t] for t in tickers}
+
+    def _revalidate_many_async(
+        self,
+        provider: str,
+        tickers: List[str],
+        statement: str,
+        fetch_many: Callable[[List[str]], Dict[str, pd.DataFrame]],
+        freq: str,
+    ) -> None:
+        with self._lock:
+            keys = {t: cache_key(provider, t, statement, freq) for t in tickers}
+            todo = [t for t in tickers if keys[t] not in self._revalidating]
+            self._revalidating.update(keys[t] for t in todo)
+        if not todo:
+            return
+
+        def run() -> None:
+            try:
+                fetched = fetch_many(todo) or {}
+                for ticker, df_new in fetched.items():
+                    if ticker in keys and df_new is not None and not df_new.empty:
+                        self.put(provider, ticker, statement, df_new, freq)
+                        self.stats.revalidations += 1
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.difference_update(keys[t] for t in todo)
+
+        threading.Thread(target=run, name=f"stmt-revalidate-batch-{statement}", daemon=True).start()
+
+    def _revalidate_async(
+        self,
+        provider: str,
+        ticker: str,
+        statement: str,
+        fetch: Callable[[], pd.DataFrame],
+        freq: str,
+    ) -> None:
+        key = cache_key(provider, ticker, statement, freq)
+        with self._lock:
+            if key in self._revalidating:
+                return
+            self._revalidating.add(key)
+
+        def run() -> None:
+            try:
+                df_new = fetch()
+                if df_new is not None and not df_new.empty:
+                    self.put(provider, ticker, statement, df_new, freq)
+                    self.stats.revalidations += 1
+            except Exception:
+                pass
+            finally:
+                with self._lock:
+                    self._revalidating.discard(key)
+
+        threading.Thread(target=run, name=f"stmt-revalidate-{ticker}-{statement}", daemon=True).start()
+
+
+# -----------------------------
+# process-wide default cache
+# -----------------------------
+_DEFAULT_CACHE: Optional[StatementCache] = None
+_DEFAULT_CACHE_READY = False
+_DEFAULT_CACHE_LOCK = threading.Lock()
+
+
+def get_statement_cache() -> Optional[StatementCache]:
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_READY
+    with _DEFAULT_CACHE_LOCK:
+        if not _DEFAULT_CACHE_READY:
+            _DEFAULT_CACHE = StatementCache.from_env()
+            _DEFAULT_CACHE_READY = True
+        return _DEFAULT_CACHE
+
+
+def set_statement_cache(cache: Optional[StatementCache]) -> None:
+    """Replace the process-wide cache (pass None to disable caching)."""
+    global _DEFAULT_CACHE, _DEFAULT_CACHE_READY
+    with _DEFAULT_CACHE_LOCK:
+        _DEFAULT_CACHE = cache
+        _DEFAULT_CACHE_READY = True
@@ -0,0 +1,261 @@
+"""
+Lightweight timing spans for the hot path.
+
+    with span("ft.download", provider=source, statement="income"):
+        ...
+
+Finished spans go to every registered sink:
+- HistogramSink:      in-memory latency histogram per span name (summary())
+- LogSink:            one log line per span
+- OpenTelemetrySink:  mirrors spans, nesting included, into an OpenTelemetry
+                      tracer (needs the optional opentelemetry-api package)
+
+A sink needs export(SpanRecord); an optional start(name, span_id, parent_id,
+start_ns) is called when a span opens.
+
+With no sink registered a span only costs a context-manager call. Spans nest
+through a ContextVar, so child spans record their parent; set FT_TRACE=log or
+FT_TRACE=histogram to register a sink at import time (get_histogram_sink()
+returns the latter).
+"""
+
+from __future__ import annotations
+
+import bisect
+import contextvars
+import itertools
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    name: str
+    span_id: int
+    parent_id: Optional[int]
+    start_ns: int             # wall clock (time.time_ns), for exporters
+    duration_s: float         # monotonic duration
+    attrs: Dict[str, Any] = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+# -----------------------------
+# sinks
+# -----------------------------
+# upper bounds in seconds; the last bucket is open-ended
+DEFAULT_BUCKETS = (0.001, 0.002, 0.005, 0.01, 0.02, 0.05, 0.1, 0.2, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0)
+
+
+class _Histogram:
+    def __init__(self, bounds: tuple) -> None:
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = float("inf")
+        self.max = 0.0
+
+    def add(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Bucket upper bound holding the q-quantile (capped at the observed max)."""
+        target = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            seen += n
+            if seen >= target and n:
+                return min(self.bounds[i], self.max) if i < len(self.bounds) else self.max
+        return self.max
+
+
+class HistogramSink:
+    def __init__(self, buckets: tuple = DEFAULT_BUCKETS) -> None:
+        self.buckets = tuple(buckets)
+        self._hists: Dict[str, _Histogram] = {}
+        self._lock = threading.Lock()
+
+    def export(self, record: SpanRecord) -> None:
+        with self._lock:
+            hist = self._hists.get(record.name)
+            if hist is None:
+                hist = self._hists[record.name] = _Histogram(self.buckets)
+            hist.add(record.duration_s)
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        with self._lock:
+            return {
+                name: {
+                    "count": h.count,
+                    "total_s": h.total,
+                    "mean_s": h.total / h.count,
+                    "min_s": h.min,
+                    "max_s": h.max,
+                    "p50_s": h.quantile(0.5),
+                    "p95_s": h.quantile(0.95),
+                }
+                for name, h in self._hists.items()
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._hists.clear()
+
+
+class LogSink:
+    def __init__(self, logger: Optional[logging.Logger] = None, level: int = logging.INFO) -> None:
+        self.logger = logger or logging.getLogger("fin.trace")
+        self.level = level
+
+    def export(self, record: SpanRecord) -> None:
+        attrs = " ".join(f"{k}={v}" for k, v in record.attrs.items())
+        status = f" error={record.error}" if record.error else ""
+        self.logger.log(self.level, "span %s %.2fms %s%s", record.name, record.duration_s * 1000, attrs, status)
+
+
+class OpenTelemetrySink:
+    """
+    Mirrors spans into an OpenTelemetry tracer (opentelemetry-api must be installed).
+
+    The OTel span is opened in start(), as a child of the enclosing span's OTel
+    span (or of the current OTel context for a root span), so the exported
+    trace keeps the nesting; export() adds the final attributes and ends it.
+    """
+
+    def __init__(self, tracer: Any = None) -> None:
+        try:
+            from opentelemetry import trace
+        except ImportError as e:
+            raise ImportError("OpenTelemetrySink needs the 'opentelemetry-api' package") from e
+        self._trace = trace
+        self.tracer = tracer if tracer is not None else trace.get_tracer("fin-deepseek-demo")
+        self._open: Dict[int, Any] = {}
+        self._lock = threading.Lock()
+
+    def start(self, name: str, span_id: int, parent_id: Optional[int], start_ns: int) -> None:
+        with self._lock:
+            parent = self._open.get(parent_id) if parent_id is not None else None
+        context = self._trace.set_span_in_context(parent) if parent is not None else None
+        otel_span = self.tracer.start_span(name, context=context, start_time=start_ns)
+        with self._lock:
+            self._open[span_id] = otel_span
+
+    def export(self, record: SpanRecord) -> None:
+        with self._lock:
+            otel_span = self._open.pop(record.span_id, None)
+        if otel_span is None:
+            # sink registered while the span was already running
+            otel_span = self.tracer.start_span(record.name, start_time=record.start_ns)
+        attrs = {k: v if isinstance(v, (str, bool, int, float)) else str(v) for k, v in record.attrs.items()}
+        if record.error:
+            attrs["error"] = record.error
+        otel_span.set_attributes(attrs)
+        otel_span.end(end_time=record.start_ns + int(record.duration_s * 1e9))
+
+
+# -----------------------------
+# registry + span API
+# -----------------------------
+_SINKS: List[Any] = []
+_SINKS_LOCK = threading.Lock()
+_CURRENT: contextvars.ContextVar[Optional[int]] = contextvars.ContextVar("ft_current_span", default=None)
+_IDS = itertools.count(1)
+
+
+def add_sink(sink: Any) -> Any:
+    """Register a sink (anything with export(SpanRecord)); returns it for convenience."""
+    global _SINKS
+    with _SINKS_LOCK:
+        _SINKS = _SINKS + [sink]
+    return sink
+
+
+def remove_sink(sink: Any) -> None:
+    global _SINKS
+    with _SINKS_LOCK:
+        _SINKS = [s for s in _SINKS if s is not sink]
+
+
+def get_sinks() -> List[Any]:
+    return list(_SINKS)
+
+
+def clear_sinks() -> None:
+    global _SINKS
+    with _SINKS_LOCK:
+        _SINKS = []
+
+
+def get_histogram_sink() -> Optional[HistogramSink]:
+    """The first registered HistogramSink (e.g. the one FT_TRACE=histogram adds), or None."""
+    return next((s for s in _SINKS if isinstance(s, HistogramSink)), None)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time the enclosed block; the yielded dict can be used to add attributes."""
+    sinks = _SINKS
+    if not sinks:
+        yield attrs
+        return
+
+    span_id = next(_IDS)
+    parent = _CURRENT.get()
+    token = _CURRENT.set(span_id)
+    start_ns = time.time_ns()
+    for sink in sinks:
+        # optional hook for sinks that open their own span up front (OpenTelemetrySink)
+        on_start = getattr(sink, "start", None)
+        if on_start is not None:
+            try:
+                on_start(name, span_id, parent, start_ns)
+            except Exception:
+                pass
+    t0 = time.perf_counter()
+    error: Optional[str] = None
+    try:
+        yield attrs
+    except BaseException as e:
+        error = type(e).__name__
+        raise
+    finally:
+        duration = time.perf_counter() - t0
+        _CURRENT.reset(token)
+        record = SpanRecord(name, span_id, parent, start_ns, duration, attrs, error)
+        for sink in sinks:
+            try:
+                sink.export(record)
+            except Exception:
+                # tracing must never break the request
+                pass
+
+
+def traced(name: str) -> Callable:
+    """Decorator form of span()."""
+
+    def deco(fn: Callable) -> Callable:
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return deco
+
+
+_mode = os.getenv("FT_TRACE", "").strip().lower()
+if _mode == "log":
+    add_sink(LogSink())
+elif _mode == "histogram":
+    add_sink(HistogramSink())
@@ -0,0 +1,202 @@
+"""
+Local statement warehouse (SQLite).
+
+Every statement ft_adapter downloads can be persisted in long format, one row
+per (provider, ticker, statement, freq, line item, period). The warehouse then
+acts as the system of record:
+- refreshes only ask the provider for periods after the latest stored one
+  (next_start -> Toolkit start_date)
+- panel metrics for a whole universe can be computed from one table scan
+  without any network I/O (scan)
+
+Disabled unless FT_WAREHOUSE_PATH is set or set_statement_warehouse() is called.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS statement_values (
+    provider   TEXT NOT NULL,
+    ticker     TEXT NOT NULL,
+    statement  TEXT NOT NULL,
+    freq       TEXT NOT NULL,
+    line_item  TEXT NOT NULL,
+    period     TEXT NOT NULL,
+    value      REAL,
+    row_pos    INTEGER NOT NULL,
+    fetched_at REAL NOT NULL,
+    PRIMARY KEY (provider, ticker, statement, freq, line_item, period)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS statement_values_scan ON statement_values (statement, freq, ticker);
+"""
+
+
+def _chunks(seq: Sequence[str], size: int = 500) -> List[Sequence[str]]:
+    # stay below SQLite's bound-parameter limit
+    return [seq[i:i + size] for i in range(0, len(seq), size)]
+
+
+def _next_start(period: Optional[str]) -> Optional[str]:
+    """First day after a stored period label ("2023" -> "2024-01-01", "2023Q4" -> "2024-01-01")."""
+    if period is None:
+        return None
+    try:
+        end = pd.Period(period).end_time.normalize()
+    except (ValueError, TypeError):
+        return None
+    return (end + pd.Timedelta(days=1)).strftime("%Y-%m-%d")
+
+
+def _to_wide(rows: pd.DataFrame) -> pd.DataFrame:
+    """Long rows of one statement -> line items x periods (provider row order kept)."""
+    order = rows.groupby("line_item", sort=False)["row_pos"].min().sort_values(kind="stable").index
+    wide = rows.pivot(index="line_item", columns="period", values="value")
+    wide = wide.reindex(index=order, columns=sorted(wide.columns))
+    wide.index.name = None
+    wide.columns.name = None
+    return wide
+
+
+class StatementWarehouse:
+    def __init__(self, path: Path) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.executescript(_SCHEMA)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> Optional["StatementWarehouse"]:
+        path = os.getenv("FT_WAREHOUSE_PATH")
+        return cls(Path(path)) if path else None
+
+    def _query(self, sql: str, params: Sequence = ()) -> pd.DataFrame:
+        with self._lock:
+            return pd.read_sql_query(sql, self._conn, params=list(params))
+
+    # -----------------------------
+    # writes
+    # -----------------------------
+    def upsert(self, provider: str, ticker: str, statement: str, df: pd.DataFrame, freq: str = "annual") -> int:
+        """Insert or overwrite the cells of one statement frame; returns rows written."""
+        if df is None or df.empty:
+            return 0
+        df = df[~df.index.astype(str).duplicated(keep="first")]
+        values = df.apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64, na_value=np.nan)
+        labels = [str(x) for x in df.index]
+        periods = [str(c) for c in df.columns]
+        now = time.time()
+        rows = [
+            (provider, ticker, statement, freq, label, period, None if np.isnan(v) else float(v), pos, now)
+            for pos, (label, row) in enumerate(zip(labels, values))
+            for period, v in zip(periods, row)
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany("INSERT OR REPLACE INTO statement_values VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+        return len(rows)
+
+    # -----------------------------
+    # reads
+    # -----------------------------
+    def next_starts(self, provider: str, tickers: Sequence[str], statement: str, freq: str = "annual") -> Dict[str, Optional[str]]:
+        """ticker -> start_date for an incremental refresh (None = nothing stored, fetch everything)."""
+        out: Dict[str, Optional[str]] = {t: None for t in tickers}
+        for chunk in _chunks(list(tickers)):
+            marks = ",".join("?" * len(chunk))
+            latest = self._query(
+                "SELECT ticker, MAX(period) AS period FROM statement_values "
+                f"WHERE provider = ? AND statement = ? AND freq = ? AND ticker IN ({marks}) GROUP BY ticker",
+                [provider, statement, freq, *chunk],
+            )
+            for ticker, period in zip(latest["ticker"], latest["period"]):
+                out[ticker] = _next_start(period)
+        return out
+
+    def load_many(self, provider: str, tickers: Sequence[str], statement: str, freq: str = "annual") -> Dict[str, pd.DataFrame]:
+        """ticker -> wide statement frame (empty frame when nothing is stored)."""
+        out: Dict[str, pd.DataFrame] = {t: pd.DataFrame() for t in tickers}
+        for chunk in _chunks(list(tickers)):
+            marks = ",".join("?" * len(chunk))
+            rows = self._query(
+                "SELECT ticker, line_item, period, value, row_pos FROM statement_values "
+                f"WHERE provider = ? AND statement = ? AND freq = ? AND ticker IN ({marks})",
+                [provider, statement, freq, *chunk],
+            )
+            for ticker, group in rows.groupby("ticker", sort=False):
+                out[ticker] = _to_wide(group)
+        return out
+
+    def load(self, provider: str, ticker: str, statement: str, freq: str = "annual") -> pd.DataFrame:
+        return self.load_many(provider, [ticker], statement, freq)[ticker]
+
+    def scan(
+        self,
+        statements: Sequence[str],
+        tickers: Optional[Sequence[str]] = None,
+        freq: str = "annual",
+        providers: Sequence[str] = ("FinancialModelingPrep", "Yahoo Finance"),
+    ) -> Tuple[Dict[str, Dict[str, pd.DataFrame]], Dict[str, str]]:
+        """
+        One pass over the table for a whole universe.
+
+        Returns (ticker -> statement -> frame, ticker -> provider) in the shape
+        compute_metrics_panel expects. A ticker stored under several providers
+        uses the first one in `providers`.
+        """
+        marks = ",".join("?" * len(statements))
+        rows = self._query(
+            "SELECT provider, ticker, statement, line_item, period, value, row_pos FROM statement_values "
+            f"WHERE freq = ? AND statement IN ({marks})",
+            [freq, *statements],
+        )
+        if tickers is not None:
+            rows = rows[rows["ticker"].isin(list(tickers))]
+
+        rank = {p: i for i, p in enumerate(providers)}
+        sources: Dict[str, str] = {}
+        for ticker, provider in rows[["ticker", "provider"]].drop_duplicates().itertuples(index=False):
+            if ticker not in sources or rank.get(provider, len(rank)) < rank.get(sources[ticker], len(rank)):
+                sources[ticker] = provider
+
+        frames: Dict[str, Dict[str, pd.DataFrame]] = {t: {} for t in (tickers if tickers is not None else sources)}
+        chosen = rows[rows["provider"] == rows["ticker"].map(sources)]
+        for (ticker, statement), group in chosen.groupby(["ticker", "statement"], sort=False):
+            frames[ticker][statement] = _to_wide(group)
+        return frames, sources
+
+
+# -----------------------------
+# process-wide default warehouse
+# -----------------------------
+_DEFAULT_WAREHOUSE: Optional[StatementWarehouse] = None
+_DEFAULT_WAREHOUSE_READY = False
+_DEFAULT_WAREHOUSE_LOCK = threading.Lock()
+
+
+def get_statement_warehouse() -> Optional[StatementWarehouse]:
+    global _DEFAULT_WAREHOUSE, _DEFAULT_WAREHOUSE_READY
+    with _DEFAULT_WAREHOUSE_LOCK:
+        if not _DEFAULT_WAREHOUSE_READY:
+            _DEFAULT_WAREHOUSE = StatementWarehouse.from_env()
+            _DEFAULT_WAREHOUSE_READY = True
+        return _DEFAULT_WAREHOUSE
+
+
+def set_statement_warehouse(warehouse: Optional[StatementWarehouse]) -> None:
+    """Replace the process-wide warehouse (pass None to disable it)."""
+    global _DEFAULT_WAREHOUSE, _DEFAULT_WAREHOUSE_READY
+    with _DEFAULT_WAREHOUSE_LOCK:
+        _DEFAULT_WAREHOUSE = warehouse
+        _DEFAULT_WAREHOUSE_READY = True